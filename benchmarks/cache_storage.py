@@ -0,0 +1,151 @@
+"""Compares the storage formats of cached release responses.
+
+The legacy format stored responses as re-serialized JSON and validated
+them with ``Release(**json.loads(value))``. The current format stores the
+raw response body, optionally compressed, and validates it directly with
+``Release.model_validate_json()``.
+
+Usage:
+    python benchmarks/cache_storage.py [--assets N] [--releases N]
+
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import string
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Callable
+
+from grd.client.models import Release
+from grd.database.compression import (
+    Encoding,
+    compress,
+    decompress,
+    get_default_encoding,
+)
+
+
+def make_release(n_assets: int, seed: int = 0) -> bytes:
+    """Creates a response body resembling GitHub's release endpoint."""
+    rng = random.Random(seed)
+
+    def word(n: int) -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=n))
+
+    def user() -> dict:
+        login = word(8)
+        return {
+            "login": login,
+            "id": rng.randrange(10**8),
+            "node_id": word(20),
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{login}",
+            "url": f"https://api.github.com/users/{login}",
+            "type": "User",
+            "site_admin": False,
+        }
+
+    assets = []
+    for i in range(n_assets):
+        name = f"{word(6)}-{i}-x86_64-unknown-linux-gnu.tar.gz"
+        assets.append(
+            {
+                "url": f"https://api.github.com/repos/o/r/releases/assets/{i}",
+                "id": i,
+                "node_id": word(20),
+                "name": name,
+                "label": "",
+                "uploader": user(),
+                "content_type": "application/gzip",
+                "state": "uploaded",
+                "size": rng.randrange(10**9),
+                "download_count": rng.randrange(10**5),
+                "created_at": "2026-01-01T00:00:00Z",
+                "updated_at": "2026-01-01T00:00:00Z",
+                "browser_download_url": f"https://github.com/o/r/releases/{name}",
+                "digest": f"sha256:{rng.randbytes(32).hex()}",
+            }
+        )
+
+    release = {
+        "url": "https://api.github.com/repos/o/r/releases/1",
+        "id": 1,
+        "author": user(),
+        "node_id": word(20),
+        "tag_name": "v1.0.0",
+        "name": "v1.0.0",
+        "draft": False,
+        "prerelease": False,
+        "created_at": "2026-01-01T00:00:00Z",
+        "published_at": "2026-01-01T00:00:00Z",
+        "assets": assets,
+        "body": " ".join(word(rng.randrange(2, 10)) for _ in range(300)),
+    }
+    return json.dumps(release).encode()
+
+
+def measure_db_size(rows: list[tuple[str, bytes | str]]) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.db"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE response_cache (key TEXT PRIMARY KEY, value)")
+        conn.executemany("INSERT INTO response_cache VALUES (?, ?)", rows)
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        return path.stat().st_size
+
+
+def time_per_call(func: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--releases", type=int, default=200)
+    args = parser.parse_args()
+
+    encodings: list[Encoding] = ["identity", "zlib"]
+    if get_default_encoding() == "zstd":
+        encodings.append("zstd")
+
+    header = f"{'assets':>6} {'format':<10} {'db size':>10} {'hit':>10} {'unused':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for n_assets in args.assets:
+        raw = make_release(n_assets)
+        number = max(1, 2000 // n_assets)
+
+        # The legacy JSON column re-serialized the decoded response
+        legacy = json.dumps(json.loads(raw))
+        size = measure_db_size([(str(i), legacy) for i in range(args.releases)])
+        hit = time_per_call(lambda: Release(**json.loads(legacy)), number)
+        unused = time_per_call(lambda: json.loads(legacy), number)
+        print(
+            f"{n_assets:>6} {'legacy':<10} {size / 1024:>7.0f} KB"
+            f" {hit * 1e6:>7.0f} us {unused * 1e6:>7.0f} us"
+        )
+
+        for encoding in encodings:
+            body, used = compress(raw, encoding)
+            size = measure_db_size([(str(i), body) for i in range(args.releases)])
+            hit = time_per_call(
+                lambda: Release.model_validate_json(decompress(body, used)),
+                number,
+            )
+            # Bodies that are never used, like after a prefetch, are not decoded
+            unused = time_per_call(lambda: body, number)
+            print(
+                f"{n_assets:>6} {encoding:<10} {size / 1024:>7.0f} KB"
+                f" {hit * 1e6:>7.0f} us {unused * 1e6:>7.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Measures the client against a local stand-in for the GitHub API.
+
+Requests are served by :py:class:`mock_github.MockGitHub`, so no rate limit
+is used. Four benchmarks are run:
+
+* ``cached_request``: the latency of :py:meth:`BaseClient.cached_request_content()`
+  for cache misses, revalidations answered with 304 Not Modified,
+  and fresh cache hits that make no request
+* ``response_cache``: the throughput of :py:class:`ResponseCache` reads
+  and writes with many entries, bypassing its in-memory tier
+* ``stream``: the throughput of :py:func:`stream_progress()` while
+  downloading a large asset
+* ``latest_releases``: the time to resolve the latest release of many
+  repositories one by one over REST, compared to batched GraphQL queries
+  with :py:meth:`ReleaseClient.get_latest_releases()`
+
+The results are written as JSON to stdout or the file given by --output,
+so they can be compared between commits.
+
+Usage:
+    python benchmarks/client_performance.py [--output FILE]
+        [--requests N] [--entries N] [--asset-mib N] [--connections N]
+        [--latency-ms N] [--bandwidth-mib N] [--repos N] [--only NAME]
+
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+from sqlalchemy.orm import sessionmaker
+
+from grd import __version__
+from grd.cli.streams import stream_progress
+from grd.client.base import BaseClient
+from grd.client.http import create_client
+from grd.database.cache import ResponseCache
+from grd.database.engine import create_engine
+from grd.database.models import Base
+from mock_github import MockGitHub
+
+T = TypeVar("T")
+
+MIB = 1 << 20
+
+
+def create_sessionmaker(path: Path) -> sessionmaker:
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(engine)
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    """Summarizes a list of latencies in seconds."""
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "ops_per_second": len(latencies) / sum(latencies),
+    }
+
+
+def time_each(func: Callable[[T], object], items: Iterable[T]) -> list[float]:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_cached_request(args: argparse.Namespace, tmp: Path) -> dict[str, Any]:
+    transport = MockGitHub(latency=args.latency_ms / 1000)
+    cache = ResponseCache(create_sessionmaker(tmp / "cached_request.db"))
+    urls = [f"/repos/owner/repo{i}/releases/latest" for i in range(args.requests)]
+    results = {}
+
+    with create_client(transport=transport) as client:
+        base = BaseClient(client=client, cache=cache)
+
+        def request(url: str) -> None:
+            base.cached_request_content("GET", url, headers=base.JSON_HEADERS)
+
+        for name, max_age in (
+            ("miss", None),
+            ("not_modified", None),
+            ("hit", datetime.timedelta(days=1)),
+        ):
+            cache.max_age = max_age
+            transport.reset()
+            results[name] = summarize(time_each(request, urls))
+            results[name]["requests"] = dict(transport.requests)
+
+    return results
+
+
+def bench_response_cache(args: argparse.Namespace, tmp: Path) -> dict[str, Any]:
+    cache = ResponseCache(
+        create_sessionmaker(tmp / "response_cache.db"),
+        memory_size=0,
+    )
+    body = MockGitHub().release
+    keys = [f"GET /repos/owner/repo{i}/releases/latest" for i in range(args.entries)]
+    rng = random.Random(0)
+    results = {}
+
+    def set_(key: str) -> None:
+        cache.set(key, body, etag='"etag"')
+
+    results["set"] = summarize(time_each(set_, keys))
+
+    start = time.perf_counter()
+    with cache.deferred():
+        for key in keys:
+            cache.set(key, body, etag='"etag"')
+    elapsed = time.perf_counter() - start
+    results["set_deferred"] = {
+        "count": len(keys),
+        "ops_per_second": len(keys) / elapsed,
+    }
+
+    shuffled = rng.sample(keys, len(keys))
+    results["get"] = summarize(time_each(cache.get, shuffled))
+
+    batches = [shuffled[i : i + 100] for i in range(0, len(shuffled), 100)]
+    latencies = time_each(cache.get_many, batches)
+    results["get_many"] = summarize(latencies)
+    results["get_many"]["ops_per_second"] = len(keys) / sum(latencies)
+
+    results["entries"] = cache.summary().entries
+    return results
+
+
+def bench_stream(args: argparse.Namespace, tmp: Path) -> dict[str, Any]:
+    transport = MockGitHub(
+        asset_size=args.asset_mib * MIB,
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth_mib * MIB if args.bandwidth_mib else None,
+    )
+    cache = ResponseCache(create_sessionmaker(tmp / "stream.db"))
+
+    with create_client(transport=transport) as client:
+        requester = BaseClient(client=client, cache=cache).get_release_client()
+
+        received = 0
+        start = time.perf_counter()
+        with requester.stream_asset(
+            "owner",
+            "repo",
+            1,
+            connections=args.connections,
+        ) as stream:
+            for data in stream_progress(stream):
+                received += len(data)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "bytes": received,
+        "connections": args.connections,
+        "seconds": elapsed,
+        "mib_per_second": received / MIB / elapsed,
+        "requests": dict(transport.requests),
+    }
+
+
+def bench_latest_releases(args: argparse.Namespace, tmp: Path) -> dict[str, Any]:
+    transport = MockGitHub(latency=args.latency_ms / 1000)
+    repos = [("owner", f"repo{i}") for i in range(args.repos)]
+    results = {}
+
+    # GraphQL is only used with a token, which the mock does not check
+    with create_client(token="token", transport=transport) as client:
+        for name in ("rest", "graphql"):
+            cache = ResponseCache(create_sessionmaker(tmp / f"latest_{name}.db"))
+            requester = BaseClient(client=client, cache=cache).get_release_client()
+            transport.reset()
+
+            start = time.perf_counter()
+            if name == "rest":
+                resolved = [requester.get_latest_release(*repo) for repo in repos]
+            else:
+                resolved = list(requester.get_latest_releases(repos).values())
+            elapsed = time.perf_counter() - start
+
+            results[name] = {
+                "releases": len(resolved),
+                "seconds": elapsed,
+                "requests": dict(transport.requests),
+            }
+
+    return results
+
+
+BENCHMARKS = {
+    "cached_request": bench_cached_request,
+    "response_cache": bench_response_cache,
+    "stream": bench_stream,
+    "latest_releases": bench_latest_releases,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", type=Path, default=None)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--asset-mib", type=int, default=2048)
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mib", type=float, default=None)
+    parser.add_argument("--repos", type=int, default=200)
+    parser.add_argument("--only", choices=BENCHMARKS, action="append")
+    args = parser.parse_args()
+
+    report: dict[str, Any] = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now().astimezone().isoformat(),
+        "options": {
+            "requests": args.requests,
+            "entries": args.entries,
+            "asset_mib": args.asset_mib,
+            "latency_ms": args.latency_ms,
+            "bandwidth_mib": args.bandwidth_mib,
+            "repos": args.repos,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, bench in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"running {name}...", file=sys.stderr)
+            report["results"][name] = bench(args, Path(tmp))
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Reports the number of database round trips made by various commands.
+
+Each command is run in a temporary home directory after the database
+has been created, and the round trips logged by ``grd -vv`` are printed.
+Commands that need the network are run with ``--offline``, which still
+exercises their startup path before failing on the empty cache.
+
+Usage:
+    python benchmarks/db_round_trips.py
+
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+COMMANDS = [
+    ["cache", "stats"],
+    ["cache", "max-age"],
+    ["store"],
+    ["--offline", "download", "owner", "repo", "-f", "*"],
+]
+
+_ROUND_TRIPS_PATTERN = re.compile(
+    r"database round trips: (\d+) statements in (\d+) transactions"
+    r" over (\d+) connections"
+)
+
+
+def run_grd(args: list[str], env: dict[str, str]) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "grd", "-vv", *args],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return result.stderr
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as home:
+        env = os.environ.copy()
+        env["HOME"] = home
+        for name in ("XDG_DATA_HOME", "XDG_CACHE_HOME", "XDG_CONFIG_HOME"):
+            env.pop(name, None)
+
+        # Create and migrate the database
+        run_grd(["cache", "stats"], env)
+
+        print(f"{'statements':>10} {'transactions':>12} {'connections':>11}  command")
+        for args in COMMANDS:
+            m = _ROUND_TRIPS_PATTERN.search(run_grd(args, env))
+            if m is None:
+                print(f"{'?':>10} {'?':>12} {'?':>11}  grd {' '.join(args)}")
+                continue
+
+            statements, transactions, connections = m.groups()
+            print(
+                f"{statements:>10} {transactions:>12} {connections:>11}"
+                f"  grd {' '.join(args)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
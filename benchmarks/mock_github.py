@@ -0,0 +1,196 @@
+"""A local stand-in for the GitHub API used by the benchmarks.
+
+:py:class:`MockGitHub` is an :py:class:`httpx.MockTransport` that can be
+passed to :py:func:`grd.client.http.create_client()`, so benchmarks never
+reach api.github.com or use up any rate limit. It serves:
+
+* ``GET /repos/{owner}/{repo}/releases/latest`` and ``.../tags/{tag}``,
+  with an ETag that is answered with 304 Not Modified when it matches
+* ``GET /repos/{owner}/{repo}/releases/assets/{id}``, redirecting
+  to a fake CDN host
+* Asset bodies from the CDN, with single ``Range`` requests
+* ``POST /graphql`` queries built by
+  :py:func:`grd.client.graphql.build_latest_releases_query()`,
+  answering every ``r<i>`` alias with the same latest release
+
+Asset bodies are generated on the fly so that multi-gigabyte assets
+do not need to fit in memory. Every response can be delayed by a fixed
+latency, and bodies can be throttled to a maximum bandwidth.
+
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Iterator
+
+import httpx
+
+from cache_storage import make_release
+
+API_HOST = "api.github.com"
+CDN_HOST = "cdn.example"
+
+_BLOCK = hashlib.sha256(b"grd").digest() * (1 << 15)  # 1 MiB
+_RELEASE_PATTERN = re.compile(r"/repos/[^/]+/[^/]+/releases/(latest|tags/[^/]+)")
+_ASSET_PATTERN = re.compile(r"/repos/[^/]+/[^/]+/releases/assets/(\d+)")
+_RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+def generate_bytes(start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    """Yields the bytes of a generated asset between start and end."""
+    offset = start
+    while offset < end:
+        i = offset % len(_BLOCK)
+        n = min(chunk_size, end - offset, len(_BLOCK) - i)
+        yield _BLOCK[i : i + n]
+        offset += n
+
+
+class MockGitHub(httpx.MockTransport):
+    """Serves releases and assets like GitHub would.
+
+    :param asset_size: The size of every asset in bytes.
+    :param assets: The number of assets in each release.
+    :param latency: The number of seconds to wait before each response.
+    :param bandwidth:
+        The maximum number of bytes per second to send asset bodies at.
+        If None, bodies are sent as fast as possible.
+    :param chunk_size: The number of bytes in each chunk of an asset body.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        asset_size: int = 1 << 20,
+        assets: int = 10,
+        latency: float = 0.0,
+        bandwidth: float | None = None,
+        chunk_size: int = 1 << 16,
+    ) -> None:
+        super().__init__(self.handle)
+        self.asset_size = asset_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+
+        release = json.loads(make_release(assets))
+        for asset in release["assets"]:
+            asset["size"] = asset_size
+            del asset["digest"]
+        self.release = json.dumps(release).encode()
+        self.etag = f'"{hashlib.sha256(self.release).hexdigest()[:16]}"'
+
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            kind = self._classify(request)
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if request.url.host == API_HOST:
+            if request.url.path == "/graphql" and request.method == "POST":
+                return self._graphql(request)
+            elif _RELEASE_PATTERN.fullmatch(request.url.path):
+                return self._release(request)
+
+            m = _ASSET_PATTERN.fullmatch(request.url.path)
+            if m is not None:
+                url = f"https://{CDN_HOST}/assets/{m[1]}"
+                return httpx.Response(302, headers={"Location": url})
+        elif request.url.host == CDN_HOST:
+            return self._asset(request)
+
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    def reset(self) -> None:
+        """Clears the number of requests made so far."""
+        with self._lock:
+            self.requests.clear()
+
+    def _asset(self, request: httpx.Request) -> httpx.Response:
+        size = self.asset_size
+        headers = {"ETag": '"asset"', "Accept-Ranges": "bytes"}
+
+        m = _RANGE_PATTERN.fullmatch(request.headers.get("Range", ""))
+        if m is None:
+            headers["Content-Length"] = str(size)
+            return httpx.Response(200, headers=headers, content=self._body(0, size))
+
+        start = int(m[1])
+        end = min(int(m[2]) + 1 if m[2] else size, size)
+        headers["Content-Length"] = str(end - start)
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        return httpx.Response(206, headers=headers, content=self._body(start, end))
+
+    def _body(self, start: int, end: int) -> Iterator[bytes]:
+        chunks = generate_bytes(start, end, self.chunk_size)
+        if self.bandwidth is None:
+            yield from chunks
+            return
+
+        started_at = time.perf_counter()
+        sent = 0
+        for chunk in chunks:
+            sent += len(chunk)
+            delay = started_at + sent / self.bandwidth - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield chunk
+
+    def _classify(self, request: httpx.Request) -> str:
+        if request.url.host == CDN_HOST:
+            return "range" if "Range" in request.headers else "asset"
+        elif request.url.path == "/graphql":
+            return "graphql"
+        elif "If-None-Match" in request.headers:
+            return "conditional"
+        return "api"
+
+    def _graphql(self, request: httpx.Request) -> httpx.Response:
+        # Only the aliases are needed, so the query itself is not parsed
+        variables = json.loads(request.content)["variables"]
+        release = json.loads(self.release)
+        node = {
+            "databaseId": release["id"],
+            "name": release["name"],
+            "tagName": release["tag_name"],
+            "isPrerelease": release["prerelease"],
+            "publishedAt": release["published_at"],
+            "releaseAssets": {
+                "pageInfo": {"hasNextPage": False},
+                "nodes": [
+                    {
+                        "databaseId": asset["id"],
+                        "name": asset["name"],
+                        "size": asset["size"],
+                        "updatedAt": asset["updated_at"],
+                        "digest": None,
+                    }
+                    for asset in release["assets"]
+                ],
+            },
+        }
+        data = {
+            f"r{name[len('owner'):]}": {"latestRelease": node}
+            for name in variables
+            if name.startswith("owner")
+        }
+        return httpx.Response(200, json={"data": data})
+
+    def _release(self, request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(
+            200,
+            headers={"ETag": self.etag, "Content-Type": "application/json"},
+            content=self.release,
+        )
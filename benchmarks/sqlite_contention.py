@@ -0,0 +1,112 @@
+"""Measures response cache throughput with many processes sharing one database.
+
+Each worker process repeatedly reads and writes responses through its own
+:py:class:`ResponseCache`, like parallel ``grd`` invocations on a build host.
+Every SQLite profile is run against a fresh database, reporting the total
+number of operations per second and how many failed with
+"database is locked".
+
+Usage:
+    python benchmarks/sqlite_contention.py [--processes N] [--operations N]
+
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import multiprocessing.synchronize
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from grd.database.cache import ResponseCache
+from grd.database.engine import PROFILES, create_engine
+from grd.database.models import Base
+
+
+def worker(
+    path: Path,
+    profile_name: str,
+    seed: int,
+    operations: int,
+    start: multiprocessing.synchronize.Event,
+) -> tuple[int, int]:
+    engine = create_engine(f"sqlite+pysqlite:///{path}", profile=PROFILES[profile_name])
+    # Bypass the in-memory tier so every lookup reaches the database
+    cache = ResponseCache(sessionmaker(engine), memory_size=0)
+    rng = random.Random(seed)
+    body = rng.randbytes(4096)
+
+    start.wait()
+    completed = failed = 0
+    for _ in range(operations):
+        key = f"GET /repos/o/r{rng.randrange(200)}/releases/latest"
+        try:
+            if rng.random() < 0.8:
+                cache.get(key)
+            else:
+                cache.set(key, body, etag='"etag"')
+        except (OperationalError, sqlite3.OperationalError) as e:
+            if "locked" not in str(e):
+                raise
+            failed += 1
+        else:
+            completed += 1
+
+    engine.dispose()
+    return completed, failed
+
+
+def run(profile_name: str, processes: int, operations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "data.db"
+        engine = create_engine(
+            f"sqlite+pysqlite:///{path}",
+            profile=PROFILES[profile_name],
+        )
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        with multiprocessing.Manager() as manager:
+            start = manager.Event()
+            with multiprocessing.Pool(processes) as pool:
+                results = pool.starmap_async(
+                    worker,
+                    [
+                        (path, profile_name, i, operations, start)
+                        for i in range(processes)
+                    ],
+                )
+                # Give every process time to connect before starting the clock
+                time.sleep(1)
+                start_time = time.perf_counter()
+                start.set()
+                counts = results.get()
+                elapsed = time.perf_counter() - start_time
+
+    completed = sum(c for c, _ in counts)
+    failed = sum(f for _, f in counts)
+    print(
+        f"{profile_name:<12} {completed / elapsed:>10.0f} ops/s"
+        f" {failed:>8} locked {elapsed:>8.2f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.operations} operations")
+    for name in PROFILES:
+        run(name, args.processes, args.operations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Fails if common commands exceed their startup time budgets.
+
+Each case is run in a temporary home directory:
+
+* ``grd cache stats``, which opens an up-to-date database and must not
+  import alembic.
+* ``grd --help``, which should only need click.
+* A fully cached ``grd --offline download``, where the latest release
+  is fresh in the response cache and its asset was already downloaded,
+  so no request is made.
+
+For each case, the median wall time and the time spent importing modules
+after ``grd`` itself, as reported by the fastest of three runs with
+``python -X importtime``, are compared against its budget, and the
+slowest top-level imports are listed. Modules that a case must not
+import are also checked.
+
+Usage:
+    python benchmarks/startup_time.py [--runs N] [--scale FACTOR]
+    python benchmarks/startup_time.py [--runs N] [--budget SECONDS] ARGS...
+
+Given ARGS, only that command is measured against the --budget for its
+wall time, and must not import alembic. Budgets are multiplied by --scale
+on slower machines. The exit code is 1 if any case went over its budget
+or imported a forbidden module.
+
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+SEED_SCRIPT = """\
+import datetime
+import json
+from pathlib import Path
+
+from grd.database.cache import ResponseCache
+from grd.database.downloads import DownloadTracker
+from grd.database.engine import sessionmaker
+from grd.database.models import Download
+
+updated_at = "2024-01-01T00:00:00Z"
+path = Path("asset.bin")
+path.write_bytes(b"0" * 1024)
+
+release = {
+    "id": 1,
+    "name": "v1",
+    "tag_name": "v1",
+    "assets": [
+        {"id": 2, "name": path.name, "size": 1024, "updated_at": updated_at},
+    ],
+}
+ResponseCache(sessionmaker).set(
+    "GET /repos/owner/repo/releases/latest",
+    json.dumps(release).encode(),
+)
+DownloadTracker(sessionmaker).save(
+    Download(
+        path=str(path.resolve()),
+        asset_id=2,
+        size=1024,
+        asset_updated_at=datetime.datetime.fromisoformat(updated_at),
+        completed_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+)
+"""
+
+
+@dataclass
+class Case:
+    name: str
+    args: list[str]
+    wall_budget: float | None = None
+    """The maximum median wall time in seconds, if any."""
+    import_budget: float | None = None
+    """The maximum time in seconds spent importing modules after grd, if any."""
+    forbidden: tuple[str, ...] = ()
+    """Top-level packages that must not be imported."""
+    seeded: bool = False
+    """Whether the database is created and seeded before measuring."""
+
+
+CASES = [
+    Case(
+        "cache stats",
+        ["cache", "stats"],
+        forbidden=("alembic",),
+    ),
+    Case(
+        "help",
+        ["--help"],
+        wall_budget=0.3,
+        import_budget=0.15,
+        forbidden=("alembic", "httpx", "pydantic", "sqlalchemy", "InquirerPy"),
+    ),
+    Case(
+        "cached download",
+        ["--offline", "download", "owner", "repo", "-f", "asset.bin", "-u"],
+        wall_budget=1.5,
+        import_budget=1.2,
+        forbidden=("alembic", "InquirerPy"),
+        seeded=True,
+    ),
+]
+
+
+@dataclass
+class ImportTime:
+    name: str
+    cumulative: int
+    """The microseconds spent importing the module and its imports."""
+    depth: int
+    """How deeply the import is nested, where 0 is a top-level import."""
+
+
+def run(
+    args: list[str],
+    env: dict[str, str],
+    cwd: Path,
+    *extra: str,
+) -> str:
+    result = subprocess.run(
+        [sys.executable, *extra, *args],
+        check=True,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return result.stderr
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Returns every module listed by ``-X importtime`` in the order
+    their imports finished.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append(ImportTime(name.strip(), int(cumulative), depth))
+    return modules
+
+
+def get_grd_import_time(modules: list[ImportTime]) -> float:
+    """Returns the seconds spent importing top-level modules
+    from the first import of grd onwards.
+    """
+    total = 0
+    counting = False
+    for module in modules:
+        if module.depth > 0:
+            continue
+        # Imports are listed once they finish, so the grd package
+        # marks the end of the interpreter's own startup
+        elif module.name == "grd":
+            counting = True
+        elif counting:
+            total += module.cumulative
+    return total / 1_000_000
+
+
+def measure(case: Case, runs: int, scale: float) -> bool:
+    with tempfile.TemporaryDirectory() as home:
+        cwd = Path(home)
+        env = os.environ.copy()
+        env["HOME"] = home
+        for name in ("XDG_DATA_HOME", "XDG_CACHE_HOME", "XDG_CONFIG_HOME"):
+            env.pop(name, None)
+
+        if case.seeded:
+            # Create the database and keep cached responses fresh
+            run(["-m", "grd", "cache", "max-age", "1d"], env, cwd)
+            run(["-c", SEED_SCRIPT], env, cwd)
+
+        # Create and migrate the database if the command uses it
+        args = ["-m", "grd", *case.args]
+        run(args, env, cwd)
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run(args, env, cwd)
+            timings.append(time.perf_counter() - start)
+
+        # importtime adds its own overhead, so take the least noisy run
+        modules = min(
+            (
+                parse_importtime(run(args, env, cwd, "-X", "importtime"))
+                for _ in range(3)
+            ),
+            key=get_grd_import_time,
+        )
+
+    median = statistics.median(timings)
+    import_time = get_grd_import_time(modules)
+    print(f"grd {' '.join(case.args)}")
+    print(
+        f"  wall {median * 1000:.0f} ms (min {min(timings) * 1000:.0f} ms),"
+        f" imports {import_time * 1000:.0f} ms"
+    )
+    top_level = [m for m in modules if m.depth == 0]
+    for module in sorted(top_level, key=lambda m: -m.cumulative)[:5]:
+        print(f"  {module.cumulative / 1000:>8.1f} ms  {module.name}")
+
+    ok = True
+    packages = {m.name.partition(".")[0] for m in modules}
+    for name in case.forbidden:
+        if name in packages:
+            print(f"  FAIL: {name} was imported")
+            ok = False
+    if case.wall_budget is not None and median > case.wall_budget * scale:
+        budget = case.wall_budget * scale
+        print(f"  FAIL: wall time exceeds the budget of {budget * 1000:.0f} ms")
+        ok = False
+    if case.import_budget is not None and import_time > case.import_budget * scale:
+        budget = case.import_budget * scale
+        print(f"  FAIL: import time exceeds the budget of {budget * 1000:.0f} ms")
+        ok = False
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--budget", type=float, default=None)
+    parser.add_argument("args", nargs="*")
+    args = parser.parse_args()
+
+    cases = CASES
+    if args.args:
+        name = " ".join(args.args)
+        cases = [Case(name, args.args, args.budget, forbidden=("alembic",))]
+
+    results = [measure(case, args.runs, args.scale) for case in cases]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
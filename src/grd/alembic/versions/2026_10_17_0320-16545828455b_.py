@@ -0,0 +1,76 @@
+"""Store raw response bodies
+
+Revision ID: 16545828455b
+Revises: 29e311d40d9a
+Create Date: 2026-10-17 03:20:48.161856
+
+"""
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+from grd.database.compression import decompress
+
+
+# revision identifiers, used by Alembic.
+revision = "16545828455b"
+down_revision = "29e311d40d9a"
+branch_labels = None
+depends_on = None
+
+response_cache = sa.table(
+    "response_cache",
+    sa.column("key", sa.String()),
+    sa.column("value", sa.JSON()),
+    sa.column("body", sa.LargeBinary()),
+    sa.column("encoding", sa.String()),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.add_column(sa.Column("body", sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column("encoding", sa.String(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(response_cache.c.key, response_cache.c.value))
+    for key, value in rows.all():
+        body = zlib.compress(json.dumps(value).encode())
+        conn.execute(
+            response_cache.update()
+            .where(response_cache.c.key == key)
+            .values(body=body, encoding="zlib")
+        )
+
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.alter_column("body", existing_type=sa.LargeBinary(), nullable=False)
+        batch_op.alter_column("encoding", existing_type=sa.String(), nullable=False)
+        batch_op.drop_column("value")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.add_column(sa.Column("value", sa.JSON(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(
+            response_cache.c.key,
+            response_cache.c.body,
+            response_cache.c.encoding,
+        )
+    )
+    for key, body, encoding in rows.all():
+        value = json.loads(decompress(body, encoding))
+        conn.execute(
+            response_cache.update()
+            .where(response_cache.c.key == key)
+            .values(value=value)
+        )
+
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.alter_column("value", existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_column("encoding")
+        batch_op.drop_column("body")
@@ -0,0 +1,74 @@
+"""Add response cache size limits
+
+Revision ID: 60b1f13e6516
+Revises: 9118a5387377
+Create Date: 2026-10-17 03:27:28.097019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from grd.database.models import TZDateTime
+
+
+# revision identifiers, used by Alembic.
+revision = "60b1f13e6516"
+down_revision = "9118a5387377"
+branch_labels = None
+depends_on = None
+
+response_cache = sa.table(
+    "response_cache",
+    sa.column("created_at", TZDateTime()),
+    sa.column("accessed_at", TZDateTime()),
+    sa.column("body", sa.LargeBinary()),
+    sa.column("size", sa.Integer()),
+)
+user = sa.table(
+    "user",
+    sa.column("cache_hits", sa.Integer()),
+    sa.column("cache_misses", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.add_column(sa.Column("accessed_at", TZDateTime(), nullable=True))
+        batch_op.add_column(sa.Column("size", sa.Integer(), nullable=True))
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column("cache_max_size", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("cache_max_entries", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("cache_hits", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("cache_misses", sa.Integer(), nullable=True))
+
+    op.execute(
+        response_cache.update().values(
+            accessed_at=response_cache.c.created_at,
+            size=sa.func.length(response_cache.c.body),
+        )
+    )
+    op.execute(user.update().values(cache_hits=0, cache_misses=0))
+
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.alter_column("accessed_at", existing_type=TZDateTime(), nullable=False)
+        batch_op.alter_column("size", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index(
+            batch_op.f("ix_response_cache_accessed_at"), ["accessed_at"], unique=False
+        )
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.alter_column("cache_hits", existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column(
+            "cache_misses", existing_type=sa.Integer(), nullable=False
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("cache_misses")
+        batch_op.drop_column("cache_hits")
+        batch_op.drop_column("cache_max_entries")
+        batch_op.drop_column("cache_max_size")
+    with op.batch_alter_table("response_cache") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_response_cache_accessed_at"))
+        batch_op.drop_column("size")
+        batch_op.drop_column("accessed_at")
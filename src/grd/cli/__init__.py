@@ -1 +1,3 @@
+# Imported first so that the profiler's start time precedes the commands
+from .. import profiling as _profiling
 from .commands import main
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import fnmatch
+import re
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from ..client.models import ReleaseAsset
+
+
+def match_assets(
+    assets: list[ReleaseAsset],
+    patterns: Sequence[str] = (),
+    regexes: Sequence[str] = (),
+) -> tuple[list[ReleaseAsset], list[str]]:
+    """Finds every asset matching at least one glob pattern or regex.
+
+    :returns:
+        A tuple containing the matched assets in the same order they were
+        given, and a list of error messages for each pattern and regex
+        that did not match any asset.
+    :raises re.error: One of the regexes is invalid.
+
+    """
+    matched: set[int] = set()
+    unmatched: list[str] = []
+
+    for pattern in patterns:
+        found = [a.id for a in assets if fnmatch.fnmatchcase(a.name, pattern)]
+        if not found:
+            unmatched.append(f'Could not find any asset named "{pattern}"')
+        matched.update(found)
+
+    for regex in regexes:
+        compiled = re.compile(regex)
+        found = [a.id for a in assets if compiled.search(a.name)]
+        if not found:
+            unmatched.append(f'Could not find any asset matching "{regex}"')
+        matched.update(found)
+
+    return [a for a in assets if a.id in matched], unmatched
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..client.models import ReleaseAsset
+    from ..client.release import ReleaseClient
+
+log = logging.getLogger(__name__)
+
+CHECKSUM_FILENAMES = ("sha256sums", "sha256sums.txt")
+"""Lowercase names of release assets listing the SHA-256 of other assets."""
+
+MAX_CHECKSUM_FILE_SIZE = 1024 * 1024
+"""The largest checksum file that will be downloaded."""
+
+_SHA256_PATTERN = re.compile(r"[0-9a-fA-F]{64}")
+
+
+class ReleaseChecksums:
+    """Looks up the expected digests of assets in a release.
+
+    Digests are taken from the ``digest`` field of each asset when
+    GitHub provides one, otherwise from a sibling ``<asset>.sha256``
+    or ``SHA256SUMS`` asset. Checksum files are downloaded at most once,
+    and this class can be shared between threads.
+
+    :param requester: The client to download checksum files with.
+    :param owner: The owner of the repository.
+    :param repo: The name of the repository.
+    :param assets: Every asset in the release.
+
+    """
+
+    def __init__(
+        self,
+        requester: ReleaseClient,
+        owner: str,
+        repo: str,
+        assets: list[ReleaseAsset],
+    ) -> None:
+        self.requester = requester
+        self.owner = owner
+        self.repo = repo
+        self.assets = assets
+
+        self._files: dict[int, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, asset: ReleaseAsset) -> str | None:
+        """Returns the expected digest of an asset in the form
+        ``algorithm:hexdigest``, or None if it is unknown.
+        """
+        if asset.digest is not None:
+            return asset.digest
+        elif is_checksum_file(asset.name):
+            return None
+
+        by_name = {a.name.lower(): a for a in self.assets}
+        sidecar = by_name.get(f"{asset.name.lower()}.sha256")
+        candidates = [sidecar] if sidecar is not None else []
+        candidates.extend(by_name[n] for n in CHECKSUM_FILENAMES if n in by_name)
+
+        for checksum_asset in candidates:
+            checksums = self._get_file(checksum_asset)
+            digest = checksums.get(asset.name)
+            if digest is None and checksum_asset is sidecar:
+                digest = checksums.get("")
+            if digest is not None:
+                return f"sha256:{digest}"
+
+        return None
+
+    def _get_file(self, asset: ReleaseAsset) -> dict[str, str]:
+        with self._lock:
+            checksums = self._files.get(asset.id)
+            if checksums is not None:
+                return checksums
+
+            checksums = {}
+            if asset.size > MAX_CHECKSUM_FILE_SIZE:
+                log.warning("ignoring checksum file %s: too large", asset.name)
+            else:
+                try:
+                    checksums = parse_checksums(self._download(asset))
+                except Exception as e:
+                    log.warning("could not download %s: %s", asset.name, e)
+
+            self._files[asset.id] = checksums
+            return checksums
+
+    def _download(self, asset: ReleaseAsset) -> str:
+        log.debug("downloading checksum file %s", asset.name)
+        with self.requester.stream_asset(self.owner, self.repo, asset.id) as stream:
+            data = b"".join(stream)
+        return data.decode(errors="replace")
+
+
+def is_checksum_file(name: str) -> bool:
+    """Checks if an asset name refers to a checksum file."""
+    name = name.lower()
+    return name in CHECKSUM_FILENAMES or name.endswith(".sha256")
+
+
+def parse_checksums(text: str) -> dict[str, str]:
+    """Parses the output of ``sha256sum`` into a mapping of filenames
+    to lowercase hex digests.
+
+    Directories are stripped from each filename. Lines containing only
+    a digest are stored under an empty filename.
+
+    """
+    checksums: dict[str, str] = {}
+    for line in text.splitlines():
+        digest, _, name = line.strip().partition(" ")
+        if _SHA256_PATTERN.fullmatch(digest) is None:
+            continue
+
+        # Binary mode is indicated by an asterisk before the filename
+        name = name.strip().removeprefix("*")
+        name = PurePosixPath(name).name if name else ""
+        checksums[name] = digest.lower()
+
+    return checksums
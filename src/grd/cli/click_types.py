@@ -43,3 +43,47 @@ class TimedeltaType(click.ParamType):
             self.fail("invalid duration (format: 1d:2h:3m:4s)")
 
         return delta
+
+
+class SizeType(click.ParamType):
+    """A click parameter type for a number of bytes.
+
+    Supported formats are:
+
+        * 1048576
+        * 512K
+        * 1.5G (binary units, case insensitive, optional "B" or "iB" suffix)
+
+    """
+
+    name = "size"
+
+    _unit_mapping = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+    _size_regex = re.compile(r"(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?")
+
+    def convert(
+        self,
+        value: str | int,
+        param: click.Parameter | None,
+        ctx: click.Context | None,
+    ) -> int:
+        if isinstance(value, int):
+            return value
+
+        m = self._size_regex.fullmatch(value.strip().lower())
+        if m is None:
+            self.fail("invalid size (format: 512M, 10G)")
+
+        n_str, unit = m.groups()
+        return int(float(n_str) * self._unit_mapping[unit])
+
+
+def format_size(n: float) -> str:
+    """Formats a number of bytes with binary units, like the inverse
+    of :py:class:`SizeType`.
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
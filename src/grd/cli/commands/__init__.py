@@ -2,4 +2,7 @@ from .auth import *
 from .cache import *
 from .download import *
 from .encrypt import *
+from .list import *
 from .main import *
+from .store import *
+from .sync import *
@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING
 import click
 
 from .main import main
-from ..click_types import TimedeltaType
+from ..click_types import SizeType, TimedeltaType, format_size
 from ..state import CLIState, pass_state
 
 if TYPE_CHECKING:
@@ -15,6 +15,9 @@ __all__ = (
     "cache",
     "cache_clear",
     "cache_expire",
+    "cache_limit",
+    "cache_max_age",
+    "cache_stats",
     "cache_where",
 )
 
@@ -41,7 +44,7 @@ def cache_clear(ctx: CLIState, yes: bool) -> None:
         message = "Are you sure you want to clear the response cache?"
         return inquirer.confirm(message).execute()
 
-    cache = ctx.get_response_cache()
+    cache = ctx.get_database_cache()
 
     if yes or confirm_clear():
         cache.clear(expired=False)
@@ -75,6 +78,150 @@ def cache_expire(ctx: CLIState, duration: datetime.timedelta | None, unset: bool
             click.echo("Response cache expiration is turned off.")
 
 
+@cache.command(name="limit")
+@click.argument("size", required=False, type=SizeType())
+@click.option(
+    "-n",
+    "--entries",
+    help="The maximum number of cached responses",
+    type=click.IntRange(min=0),
+)
+@click.option("-u", "--unset", is_flag=True)
+@pass_state
+def cache_limit(
+    ctx: CLIState,
+    size: int | None,
+    entries: int | None,
+    unset: bool,
+) -> None:
+    """Sets the maximum size of the response cache.
+
+    When the cache exceeds either limit, the least recently used
+    responses are evicted.
+
+    \b
+    Examples:
+        grd cache limit              # display the current limits
+        grd cache limit 50M          # limit the cache to 50 MiB
+        grd cache limit -n 1000      # limit the cache to 1000 responses
+        grd cache limit --unset      # remove both limits
+
+    """
+    with ctx.begin() as session:
+        user = ctx.get_user(session)
+
+        if unset:
+            user.cache_max_size = None
+            user.cache_max_entries = None
+        elif size is not None or entries is not None:
+            if size is not None:
+                user.cache_max_size = size
+            if entries is not None:
+                user.cache_max_entries = entries
+        elif user.cache_max_size is None and user.cache_max_entries is None:
+            click.echo("Response cache size is unlimited.")
+        else:
+            if user.cache_max_size is not None:
+                limit = format_size(user.cache_max_size)
+                click.echo(f"Response cache is limited to: {limit}")
+            if user.cache_max_entries is not None:
+                limit = user.cache_max_entries
+                click.echo(f"Response cache is limited to: {limit} responses")
+
+        max_size = user.cache_max_size
+        max_entries = user.cache_max_entries
+
+    # The cache was created with the previous limits, which it would
+    # otherwise enforce once more when flushed at the end of the command
+    cache = ctx.get_database_cache()
+    cache.max_size = max_size
+    cache.max_entries = max_entries
+    if size is not None or entries is not None:
+        cache.evict()
+
+
+@cache.command(name="max-age")
+@click.argument("duration", required=False, type=TimedeltaType())
+@click.option(
+    "--stale",
+    help="How long stale responses can be used while revalidating them",
+    type=TimedeltaType(),
+)
+@click.option("-u", "--unset", is_flag=True)
+@pass_state
+def cache_max_age(
+    ctx: CLIState,
+    duration: datetime.timedelta | None,
+    stale: datetime.timedelta | None,
+    unset: bool,
+):
+    """Sets how long cached responses are used without contacting GitHub.
+
+    Responses older than the max age are revalidated with a conditional
+    request before being used. With --stale, responses that are only
+    slightly older are used immediately and revalidated afterwards.
+
+    \b
+    Examples:
+        grd cache max-age                # display the current duration
+        grd cache max-age 10m            # skip requests for 10 minutes
+        grd cache max-age 10m --stale 1d # and revalidate for 1 day after
+        grd cache max-age --unset        # always revalidate responses
+
+    """
+    with ctx.begin() as session:
+        user = ctx.get_user(session)
+
+        if unset:
+            user.cache_max_age = None
+            user.cache_stale_while_revalidate = None
+        elif duration is not None or stale is not None:
+            if duration is not None:
+                user.cache_max_age = duration
+            if stale is not None:
+                user.cache_stale_while_revalidate = stale
+        elif user.cache_max_age is not None:
+            click.echo(f"Responses are fresh for: {user.cache_max_age}")
+            if user.cache_stale_while_revalidate is not None:
+                click.echo(
+                    "Stale responses are revalidated in the background for: "
+                    f"{user.cache_stale_while_revalidate}"
+                )
+        else:
+            click.echo("Responses are always revalidated.")
+
+
+@cache.command(name="stats")
+@pass_state
+def cache_stats(ctx: CLIState) -> None:
+    """Show the size and hit ratio of the response cache."""
+    user = ctx.load_user()
+    hits = user.cache_hits
+    misses = user.cache_misses
+    max_size = user.cache_max_size
+    max_entries = user.cache_max_entries
+
+    summary = ctx.get_database_cache().summary()
+
+    size = format_size(summary.size)
+    click.echo(f"Cached responses: {summary.entries} ({size})")
+    if summary.expired:
+        click.echo(f"Expired responses: {summary.expired}")
+    if summary.oldest is not None and summary.newest is not None:
+        click.echo(f"Oldest response: {summary.oldest.astimezone():%c}")
+        click.echo(f"Newest response: {summary.newest.astimezone():%c}")
+    if max_size is not None:
+        click.echo(f"Size limit: {format_size(max_size)}")
+    if max_entries is not None:
+        click.echo(f"Entry limit: {max_entries}")
+
+    lookups = hits + misses
+    if lookups > 0:
+        click.echo(f"Hit ratio: {hits / lookups:.1%} ({hits} of {lookups} lookups)")
+    else:
+        click.echo("Hit ratio: no lookups yet")
+
+
 @cache.command(name="where")
 def cache_where() -> None:
     """Show where the cache database is located."""
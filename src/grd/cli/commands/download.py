@@ -1,47 +1,78 @@
 from __future__ import annotations
 
+import re
 import sys
 import textwrap
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
 
 import click
 
 from .main import main
+from ..assets import match_assets
 from ..errors import wrap_httpx_errors
 from ..state import CLIState, pass_state
-from ..streams import stream_progress
 
 if TYPE_CHECKING:
     from ...client.models import ReleaseAsset
+    from ..transfer import DownloadResult
+    from ...database.store import LinkMode
 
 __all__ = ("download",)
 
 
-def _find_asset(assets: list[ReleaseAsset], name: str) -> ReleaseAsset:
-    for a in assets:
-        if a.name == name:
-            return a
+def _find_assets(
+    assets: list[ReleaseAsset],
+    patterns: Sequence[str],
+    regexes: Sequence[str],
+) -> list[ReleaseAsset]:
+    try:
+        matched, unmatched = match_assets(assets, patterns, regexes)
+    except re.error as e:
+        sys.exit(f"Invalid regex: {e}")
 
-    asset_names = textwrap.indent("\n".join(a.name for a in assets), "    ")
-    sys.exit(
-        f'Could not find any asset named "{name}"\n'
-        "Available assets:\n"
-        f"{asset_names}"
-    )
+    if unmatched:
+        asset_names = textwrap.indent("\n".join(a.name for a in assets), "    ")
+        errors = "\n".join(unmatched)
+        sys.exit(f"{errors}\nAvailable assets:\n{asset_names}")
 
+    return matched
 
-def _select_asset(assets: list[ReleaseAsset]) -> ReleaseAsset:
+
+def _select_assets(assets: list[ReleaseAsset]) -> list[ReleaseAsset]:
     from InquirerPy import inquirer
     from InquirerPy.base.control import Choice
 
     assert len(assets) > 0
 
     return inquirer.select(
-        "Select an asset to download:",
+        "Select assets to download (space to toggle):",
         [Choice(name=a.name, value=a) for a in assets],
+        multiselect=True,
     ).execute()
 
 
+def _echo_summary(results: list[DownloadResult]) -> None:
+    from ..transfer import DownloadStatus
+
+    verbs = {
+        DownloadStatus.DOWNLOADED: "Downloaded",
+        DownloadStatus.STORED: "Restored",
+        DownloadStatus.UNCHANGED: "Unchanged",
+    }
+
+    for result in results:
+        if result.status is not None:
+            click.echo(f"{verbs[result.status]} {result.job.path}")
+        else:
+            click.echo(
+                f"Failed to download {result.job.path}: {result.error}", err=True
+            )
+
+    failed = sum(not result.ok for result in results)
+    click.echo(f"{len(results) - failed} succeeded, {failed} failed")
+
+
 @main.command()
 @click.argument("owner")
 @click.argument("repo")
@@ -54,7 +85,54 @@ def _select_asset(assets: list[ReleaseAsset]) -> ReleaseAsset:
 @click.option(
     "-f",
     "--file",
-    help="Immediately download the given filename",
+    "patterns",
+    help="Download assets matching the given filename or glob pattern",
+    metavar="PATTERN",
+    multiple=True,
+)
+@click.option(
+    "-e",
+    "--regex",
+    "regexes",
+    help="Download assets matching the given regular expression",
+    metavar="REGEX",
+    multiple=True,
+)
+@click.option(
+    "-c",
+    "--connections",
+    default=1,
+    help="Download the asset over multiple connections",
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=4,
+    help="The maximum number of assets to download at once",
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--link",
+    "link_mode",
+    default="auto",
+    help="How assets are materialized from the local asset store",
+    show_default=True,
+    type=click.Choice(["auto", "reflink", "hardlink", "copy"]),
+)
+@click.option(
+    "--verify/--no-verify",
+    default=True,
+    help="Verify the digest of each asset while downloading",
+    show_default=True,
+)
+@click.option(
+    "-u",
+    "--update",
+    help="Replace existing files if their asset has changed",
+    is_flag=True,
 )
 @pass_state
 @wrap_httpx_errors
@@ -63,43 +141,119 @@ def download(
     owner: str,
     repo: str,
     tag: str | None,
-    file: str | None,
+    patterns: tuple[str, ...],
+    regexes: tuple[str, ...],
+    connections: int,
+    jobs: int,
+    link_mode: LinkMode,
+    verify: bool,
+    update: bool,
 ):
-    """Download the first asset from a release in the given repository.
+    """Download assets from a release in the given repository.
 
     The -r/--release option can be used to download assets from a specific
     release. Note that you must provide the *tag name*, not the title of
     the release itself. If the option is not specified, the latest release
     will be used.
 
+    The -f/--file and -e/--regex options can be repeated to select multiple
+    assets without being prompted. When more than one asset is selected,
+    up to -j/--jobs assets are downloaded concurrently.
+
+    Large assets can be downloaded faster by splitting them across
+    multiple connections with the -c/--connections option.
+
+    Assets are written to a .part file while downloading. If the download
+    is interrupted, running the same command again will resume it.
+
+    Existing files are not overwritten unless -u/--update is given, in which
+    case they are only downloaded again if the asset has changed since
+    the last download.
+
+    Each asset is hashed while it is being written and checked against
+    the digest listed by GitHub or a SHA256SUMS / <asset>.sha256 file in
+    the release. If the digest does not match, the file is removed.
+
+    If the local asset store is enabled with "grd store enable", assets
+    that were downloaded before are taken from the store instead.
+
+    With "grd --offline", the release is looked up from the response
+    cache, and only assets in the store or unchanged files can be used.
+
     """
-    from ...client.base import BaseClient
-    from ...client.http import create_client
+    from ...client.base import BaseClient, CacheMissError
+    from ...client.http import OfflineError, create_client
+    from ..checksums import ReleaseChecksums
+    from ..transfer import AssetDownloader, DigestMismatchError, DownloadJob
+
+    token = ctx.get_auth()
+    cache = ctx.get_response_cache()
+    store = None
+    if not ctx.no_db and ctx.load_user().asset_store_enabled:
+        store = ctx.get_asset_store(link_mode=link_mode)
 
-    with ctx.begin() as session:
-        user = ctx.get_user(session)
-        token = ctx.get_auth(user)
-        cache = ctx.get_response_cache(user)
+    tracker = ctx.get_download_tracker()
 
-    with cache.bucket(), create_client(token=token) as client:
-        base = BaseClient(client=client, cache=cache)
+    with cache.bucket(), create_client(token=token, offline=ctx.offline) as client:
+        base = BaseClient(
+            client=client,
+            cache=cache,
+            offline=ctx.offline,
+            rate_limiter=ctx.get_rate_limiter(token),
+            retry_policy=ctx.get_retry_policy(),
+        )
         requester = base.get_release_client()
 
-        if tag is not None:
-            release = requester.get_release_by_tag(owner, repo, tag)
-        else:
-            release = requester.get_latest_release(owner, repo)
+        try:
+            if tag is not None:
+                release = requester.get_release_by_tag(owner, repo, tag)
+            else:
+                release = requester.get_latest_release(owner, repo)
+        except CacheMissError as e:
+            sys.exit(f"{e}\nRun this command without --offline to cache it.")
 
         if not release.assets:
             sys.exit("This release does not have any assets.")
-        elif file is not None:
-            asset = _find_asset(release.assets, file)
+        elif patterns or regexes:
+            assets = _find_assets(release.assets, patterns, regexes)
+        else:
+            assets = _select_assets(release.assets)
+
+        downloader = AssetDownloader(
+            requester,
+            connections=connections,
+            tracker=tracker,
+            store=store,
+            verify=verify,
+            update=update,
+            retry_policy=ctx.get_retry_policy(),
+        )
+        checksums = ReleaseChecksums(requester, owner, repo, release.assets)
+
+        exit_code: int | str | None = None
+        if len(assets) == 1:
+            try:
+                downloader.download(
+                    owner,
+                    repo,
+                    assets[0],
+                    Path(assets[0].name),
+                    checksums=checksums,
+                )
+            except (DigestMismatchError, FileExistsError, OfflineError) as e:
+                exit_code = str(e)
         else:
-            asset = _select_asset(release.assets)
-
-        with (
-            open(asset.name, "xb") as f,
-            requester.stream_asset(owner, repo, asset.id) as stream,
-        ):
-            for data in stream_progress(stream):
-                f.write(data)
+            results = downloader.download_many(
+                [DownloadJob(owner, repo, a, Path(a.name), checksums) for a in assets],
+                workers=jobs,
+            )
+            _echo_summary(results)
+            if not all(result.ok for result in results):
+                exit_code = 1
+
+        # Stale cached responses are only revalidated once the
+        # downloads have finished, so they don't delay them
+        base.revalidate_stale()
+
+    if exit_code is not None:
+        sys.exit(exit_code)
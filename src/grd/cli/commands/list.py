@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+import click
+
+from .main import main
+from ..state import CLIState, pass_state
+
+if TYPE_CHECKING:
+    from ...client.models import Release
+
+__all__ = ("list_releases",)
+
+
+def _format_release(release: Release) -> str:
+    published = "unpublished"
+    if release.published_at is not None:
+        published = release.published_at.strftime("%Y-%m-%d")
+
+    assets = len(release.assets)
+    line = (
+        f"{release.tag_name:<20} {published:<11} "
+        f"{assets:>3} asset{'' if assets == 1 else 's'}  {release.name}"
+    )
+    if release.prerelease:
+        line += " (pre-release)"
+    return line
+
+
+@main.command(name="list")
+@click.argument("owner")
+@click.argument("repo")
+@click.option(
+    "-j",
+    "--jobs",
+    default=4,
+    help="The maximum number of pages to request concurrently",
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "-n",
+    "--limit",
+    help="Stop after listing this many releases",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--json",
+    "as_json",
+    help="Write each release as a line of JSON",
+    is_flag=True,
+)
+@pass_state
+def list_releases(
+    ctx: CLIState,
+    owner: str,
+    repo: str,
+    jobs: int,
+    limit: int | None,
+    as_json: bool,
+):
+    """List the releases in the given repository, newest first.
+
+    Releases are printed as soon as their page of results arrives.
+    Each page is cached, so listing the same repository again mostly
+    makes conditional requests which do not count against the rate limit.
+
+    With --json, each release is written as one JSON object per line
+    (NDJSON), which can be piped into other tools:
+
+    \b
+        grd list OWNER REPOSITORY --json | jq -r .tag_name
+
+    """
+    import contextlib
+    import itertools
+
+    from ...client.base import BaseClient, CacheMissError
+    from ...client.http import create_client
+
+    token = ctx.get_auth()
+    cache = ctx.get_response_cache()
+
+    with cache.bucket(), create_client(token=token, offline=ctx.offline) as client:
+        base = BaseClient(
+            client=client,
+            cache=cache,
+            offline=ctx.offline,
+            rate_limiter=ctx.get_rate_limiter(token),
+            retry_policy=ctx.get_retry_policy(),
+        )
+        requester = base.get_release_client()
+        releases = requester.list_releases(owner, repo, workers=jobs)
+
+        try:
+            # Pages are requested concurrently, so their writes are deferred
+            # to avoid contending for the database
+            with cache.deferred(), contextlib.closing(releases):
+                for release in itertools.islice(releases, limit):
+                    if as_json:
+                        click.echo(release.model_dump_json())
+                    else:
+                        click.echo(_format_release(release))
+        except CacheMissError as e:
+            sys.exit(f"{e}\nRun this command without --offline to cache it.")
+
+        base.revalidate_stale(workers=jobs)
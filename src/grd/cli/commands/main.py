@@ -1,5 +1,7 @@
 import click
 
+from ..state import CLIState
+
 __all__ = ("main",)
 
 
@@ -14,7 +16,40 @@ __all__ = ("main",)
     count=True,
     help="Increase verbosity of the program.",
 )
-def main(verbose: int):
+@click.option(
+    "--offline",
+    envvar="GRD_OFFLINE",
+    help="Only use cached responses and never connect to GitHub.",
+    is_flag=True,
+)
+@click.option(
+    "--no-db",
+    envvar="GRD_NO_DB",
+    help="Never open the database, caching responses only in memory.",
+    is_flag=True,
+)
+@click.option(
+    "--retries",
+    default=3,
+    envvar="GRD_RETRIES",
+    help="The number of times to retry requests that failed temporarily.",
+    show_default=True,
+    type=click.IntRange(min=0),
+)
+@click.option(
+    "--profile",
+    help="Print the time spent in each phase of the command to stderr.",
+    is_flag=True,
+)
+@click.pass_context
+def main(
+    ctx: click.Context,
+    verbose: int,
+    offline: bool,
+    no_db: bool,
+    retries: int,
+    profile: bool,
+):
     """github-release-downloader
 
     A user-friendly utility for downloading GitHub release assets.
@@ -32,7 +67,25 @@ def main(verbose: int):
         # Update authentication credentials
         grd auth
 
+    \b
+        # Resolve releases from the response cache without a network
+        grd --offline sync manifest.toml
+
+    \b
+        # Download without a database, e.g. in a CI job
+        GRD_TOKEN=... grd --no-db download USERNAME REPOSITORY
+
     """
+    if profile:
+        from ...profiling import profiler
+
+        profiler.enable()
+        # Registered first so the report includes the time spent closing
+        ctx.call_on_close(lambda: click.echo(profiler.report(), err=True))
+
+    ctx.obj = CLIState(offline=offline, no_db=no_db, retries=retries)
+    ctx.call_on_close(ctx.obj.close)
+
     if verbose:
         import logging
 
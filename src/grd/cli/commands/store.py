@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import click
+
+from .main import main
+from ..click_types import SizeType, format_size
+from ..state import CLIState, pass_state
+
+__all__ = (
+    "store",
+    "store_clear",
+    "store_disable",
+    "store_enable",
+    "store_limit",
+    "store_where",
+)
+
+
+@main.group(invoke_without_command=True)
+@click.pass_context
+def store(click_ctx: click.Context) -> None:
+    """Manage the local asset store.
+
+    When enabled, downloaded assets are kept in a local store so that
+    downloading the same asset again, even into a different directory,
+    requires no network traffic. Assets are materialized from the store
+    by reflinking or copying them, or by hardlinking them with
+    "--link hardlink", in which case the materialized files are read-only.
+
+    """
+    if click_ctx.invoked_subcommand is not None:
+        return
+
+    ctx = click_ctx.ensure_object(CLIState)
+    user = ctx.load_user()
+    enabled = user.asset_store_enabled
+    max_size = user.asset_store_max_size
+
+    count, total = ctx.get_asset_store().size()
+    click.echo(f"Asset store is {'enabled' if enabled else 'disabled'}.")
+    click.echo(f"Stored assets: {count} ({format_size(total)})")
+    if max_size is not None:
+        click.echo(f"Size limit: {format_size(max_size)}")
+
+
+@store.command(name="clear")
+@click.option("-y", "--yes", help="Skip confirmation prompt", is_flag=True)
+@pass_state
+def store_clear(ctx: CLIState, yes: bool) -> None:
+    """Remove every asset from the local asset store."""
+
+    def confirm_clear():
+        from InquirerPy import inquirer
+
+        message = "Are you sure you want to clear the asset store?"
+        return inquirer.confirm(message).execute()
+
+    if yes or confirm_clear():
+        ctx.get_asset_store().clear()
+
+
+@store.command(name="disable")
+@pass_state
+def store_disable(ctx: CLIState) -> None:
+    """Stop adding downloaded assets to the local asset store.
+
+    Assets that were already stored are kept until the store is cleared.
+
+    """
+    with ctx.begin() as session:
+        ctx.get_user(session).asset_store_enabled = False
+
+
+@store.command(name="enable")
+@pass_state
+def store_enable(ctx: CLIState) -> None:
+    """Start adding downloaded assets to the local asset store."""
+    with ctx.begin() as session:
+        ctx.get_user(session).asset_store_enabled = True
+
+
+@store.command(name="limit")
+@click.argument("size", required=False, type=SizeType())
+@click.option("-u", "--unset", is_flag=True)
+@pass_state
+def store_limit(ctx: CLIState, size: int | None, unset: bool) -> None:
+    """Sets the maximum size of the local asset store.
+
+    When the store exceeds this size, the least recently used
+    assets are evicted.
+
+    \b
+    Examples:
+        grd store limit          # display the current limit
+        grd store limit 10G      # limit the store to 10 GiB
+        grd store limit --unset  # remove the limit
+
+    """
+    with ctx.begin() as session:
+        user = ctx.get_user(session)
+
+        if unset:
+            user.asset_store_max_size = None
+        elif size is not None:
+            user.asset_store_max_size = size
+        elif user.asset_store_max_size is not None:
+            limit = format_size(user.asset_store_max_size)
+            click.echo(f"Asset store is limited to: {limit}")
+        else:
+            click.echo("Asset store size is unlimited.")
+
+    if size is not None:
+        ctx.get_asset_store().evict(size)
+
+
+@store.command(name="where")
+def store_where() -> None:
+    """Show where the asset store is located."""
+    from ...database import store_path
+
+    click.echo(store_path)
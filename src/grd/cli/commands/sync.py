@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+import click
+
+from .main import main
+from ..assets import match_assets
+from ..state import CLIState, pass_state
+
+if TYPE_CHECKING:
+    from ...client.models import Release
+    from ...client.release import ReleaseClient
+    from ...database.store import LinkMode
+    from ..manifest import ManifestRelease
+
+__all__ = ("sync",)
+
+
+def _format_error(e: BaseException) -> str:
+    lines = str(e).splitlines()
+    return lines[0] if lines else type(e).__name__
+
+
+def _resolve_releases(
+    requester: ReleaseClient,
+    entries: list[ManifestRelease],
+    *,
+    workers: int,
+) -> dict[tuple[str, str, str], Release | Exception]:
+    """Resolves the release of each manifest entry concurrently.
+
+    Entries referring to the same release are only resolved once.
+    Latest releases are first resolved in batches with GraphQL,
+    and any that could not be are resolved individually.
+
+    """
+
+    def resolve(owner: str, repo: str, tag: str) -> Release | Exception:
+        try:
+            if tag == "latest":
+                return requester.get_latest_release(owner, repo)
+            return requester.get_release_by_tag(owner, repo, tag)
+        except Exception as e:
+            return e
+
+    keys = list(dict.fromkeys((e.owner, e.repo, e.tag) for e in entries))
+    requester.prefetch_releases(
+        (owner, repo, None if tag == "latest" else tag) for owner, repo, tag in keys
+    )
+
+    results: dict[tuple[str, str, str], Release | Exception] = {}
+    latest = [(owner, repo) for owner, repo, tag in keys if tag == "latest"]
+    if latest:
+        for (owner, repo), release in requester.get_latest_releases(latest).items():
+            results[owner, repo, "latest"] = release
+
+    remaining = [key for key in keys if key not in results]
+    with ThreadPoolExecutor(workers, thread_name_prefix="grd-resolve") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, resolve, *key)
+            for key in remaining
+        ]
+        results.update(zip(remaining, (fut.result() for fut in futures)))
+
+    return {key: results[key] for key in keys}
+
+
+@main.command()
+@click.argument(
+    "manifest",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=8,
+    help="The maximum number of concurrent requests and downloads",
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "-c",
+    "--connections",
+    default=1,
+    help="Download each asset over multiple connections",
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "-o",
+    "--report",
+    default="-",
+    help="Write the JSON report to the given file",
+    show_default=True,
+    type=click.File("w"),
+)
+@click.option(
+    "--link",
+    "link_mode",
+    default="auto",
+    help="How assets are materialized from the local asset store",
+    show_default=True,
+    type=click.Choice(["auto", "reflink", "hardlink", "copy"]),
+)
+@click.option(
+    "--verify/--no-verify",
+    default=True,
+    help="Verify the digest of each asset while downloading",
+    show_default=True,
+)
+@click.option(
+    "-u",
+    "--update",
+    help="Replace existing files if their asset has changed",
+    is_flag=True,
+)
+@pass_state
+def sync(
+    ctx: CLIState,
+    manifest: Path,
+    jobs: int,
+    connections: int,
+    report: TextIO,
+    link_mode: LinkMode,
+    verify: bool,
+    update: bool,
+):
+    """Download any missing assets listed in a manifest.
+
+    The manifest is a TOML or JSON file containing a list of releases:
+
+    \b
+        [[releases]]
+        owner = "OWNER"
+        repo = "REPOSITORY"
+        tag = "v1.0.0"       # optional, defaults to "latest"
+        assets = ["*.zip"]   # optional glob patterns
+        regexes = ["linux"]  # optional regular expressions
+        dest = "downloads"   # optional, relative to the manifest
+
+    Assets matching any of the patterns or regexes are downloaded,
+    or every asset in the release if neither are given.
+
+    Releases are resolved concurrently over a shared connection pool,
+    and assets that already exist in their destination are skipped.
+    With -u/--update, existing files are instead checked with a
+    conditional request and only downloaded again if they changed.
+    Once finished, a JSON report of every asset is written to stdout
+    or the file given by -o/--report. The exit code is 1 if any
+    release or asset failed.
+
+    Unless --no-verify is given, each asset is checked against the digest
+    listed by GitHub or a checksum file in the same release.
+
+    If the local asset store is enabled, assets that were downloaded
+    before are materialized from the store and reported as "stored".
+
+    With "grd --offline", releases are resolved only from the response
+    cache, and any responses that are missing are listed on stderr.
+
+    """
+    import httpx
+
+    from ...client.base import BaseClient, CacheMissError
+    from ...client.http import create_client
+    from ..checksums import ReleaseChecksums
+    from ..manifest import load_manifest
+    from ..transfer import AssetDownloader, DownloadJob
+
+    try:
+        entries = load_manifest(manifest).releases
+    except (OSError, ValueError) as e:
+        sys.exit(f"Failed to load manifest: {e}")
+
+    token = ctx.get_auth()
+    cache = ctx.get_response_cache()
+    store = None
+    if not ctx.no_db and ctx.load_user().asset_store_enabled:
+        store = ctx.get_asset_store(link_mode=link_mode)
+
+    tracker = ctx.get_download_tracker()
+    limits = httpx.Limits(
+        max_connections=jobs * connections,
+        max_keepalive_connections=jobs,
+    )
+
+    with (
+        cache.bucket(),
+        create_client(token=token, limits=limits, offline=ctx.offline) as client,
+    ):
+        base = BaseClient(
+            client=client,
+            cache=cache,
+            offline=ctx.offline,
+            rate_limiter=ctx.get_rate_limiter(token),
+            retry_policy=ctx.get_retry_policy(),
+        )
+        requester = base.get_release_client()
+        with cache.deferred():
+            releases = _resolve_releases(requester, entries, workers=jobs)
+
+        missing = [
+            key
+            for release in releases.values()
+            if isinstance(release, CacheMissError)
+            for key in release.keys
+        ]
+        if missing:
+            click.echo("The following responses are not cached:", err=True)
+            for key in missing:
+                click.echo(f"    {key}", err=True)
+            click.echo(
+                "Run this manifest without --offline on a connected machine "
+                "to cache them.",
+                err=True,
+            )
+
+        results: list[dict[str, Any]] = []
+        pending: list[tuple[dict[str, Any], DownloadJob]] = []
+
+        for entry in entries:
+            result: dict[str, Any] = {
+                "owner": entry.owner,
+                "repo": entry.repo,
+                "tag": entry.tag,
+                "release": None,
+                "error": None,
+                "assets": [],
+            }
+            results.append(result)
+
+            release = releases[entry.owner, entry.repo, entry.tag]
+            if isinstance(release, Exception):
+                result["error"] = _format_error(release)
+                continue
+
+            result["release"] = release.tag_name
+            patterns = entry.assets
+            if not entry.assets and not entry.regexes:
+                patterns = ["*"]
+
+            try:
+                assets, unmatched = match_assets(
+                    release.assets,
+                    patterns,
+                    entry.regexes,
+                )
+            except re.error as e:
+                result["error"] = f"Invalid regex: {e}"
+                continue
+
+            if unmatched:
+                result["error"] = "; ".join(unmatched)
+
+            checksums = ReleaseChecksums(
+                requester,
+                entry.owner,
+                entry.repo,
+                release.assets,
+            )
+            for asset in assets:
+                path = entry.dest / asset.name
+                asset_result = {
+                    "name": asset.name,
+                    "path": str(path),
+                    "status": "skipped",
+                    "error": None,
+                }
+                result["assets"].append(asset_result)
+
+                if update or not path.exists():
+                    job = DownloadJob(
+                        entry.owner,
+                        entry.repo,
+                        asset,
+                        path,
+                        checksums,
+                    )
+                    pending.append((asset_result, job))
+
+        downloader = AssetDownloader(
+            requester,
+            connections=connections,
+            tracker=tracker,
+            store=store,
+            verify=verify,
+            update=update,
+            retry_policy=ctx.get_retry_policy(),
+        )
+        for directory in {job.path.parent for _, job in pending}:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Revalidate any stale cached responses while downloading,
+        # since the releases have already been resolved from them
+        with ThreadPoolExecutor(1) as executor:
+            executor.submit(
+                contextvars.copy_context().run,
+                base.revalidate_stale,
+                workers=jobs,
+            )
+            downloads = downloader.download_many(
+                [job for _, job in pending],
+                workers=jobs,
+            )
+
+        for (asset_result, _), download in zip(pending, downloads):
+            if download.error is not None:
+                asset_result["status"] = "failed"
+                asset_result["error"] = _format_error(download.error)
+            elif download.status is not None:
+                asset_result["status"] = download.status.value
+
+    ok = all(
+        r["error"] is None and all(a["error"] is None for a in r["assets"])
+        for r in results
+    )
+    json.dump({"ok": ok, "releases": results}, report, indent=2)
+    report.write("\n")
+
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import tomllib
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+
+class ManifestRelease(BaseModel):
+    """A release to synchronize assets from."""
+
+    owner: str
+    repo: str
+    tag: str = "latest"
+    assets: list[str] = Field(default_factory=list)
+    regexes: list[str] = Field(default_factory=list)
+    dest: Path = Path(".")
+
+
+class Manifest(BaseModel):
+    """Describes a set of release assets to be downloaded.
+
+    Example TOML manifest::
+
+        [[releases]]
+        owner = "thegamecracks"
+        repo = "github-release-downloader"
+        tag = "v1.0.0"  # defaults to "latest"
+        assets = ["*.whl"]  # glob patterns
+        regexes = ["linux"]  # regular expressions
+        dest = "wheels"  # relative to the manifest
+
+    Assets matching any of the glob patterns or regexes are selected.
+    If neither are given, every asset in the release is selected.
+    JSON manifests follow the same structure.
+
+    """
+
+    releases: list[ManifestRelease]
+
+
+def load_manifest(path: Path) -> Manifest:
+    """Loads a TOML or JSON manifest from the given path.
+
+    Relative destinations are resolved against the manifest's directory.
+
+    :raises OSError: The manifest could not be read.
+    :raises ValueError: The manifest is malformed.
+
+    """
+    data = path.read_bytes()
+    if path.suffix.lower() == ".json":
+        manifest = Manifest.model_validate_json(data)
+    else:
+        manifest = Manifest.model_validate(tomllib.loads(data.decode()))
+
+    for release in manifest.releases:
+        release.dest = path.parent / release.dest
+
+    return manifest
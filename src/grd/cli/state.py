@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import logging
+import os
 import sys
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
 import click
 
+from ..profiling import profiler
+
 if TYPE_CHECKING:
     from typing import ContextManager
 
     from sqlalchemy.orm import Session
 
+    from ..client.cache import ResponseCache as ClientResponseCache
+    from ..client.ratelimit import RateLimiter
+    from ..client.retry import RetryPolicy
     from ..database.cache import ResponseCache
+    from ..database.downloads import DownloadTracker
+    from ..database.memory import MemoryResponseCache
     from ..database.models import User
+    from ..database.store import AssetStore, LinkMode
+
+log = logging.getLogger(__name__)
 
 
 class CLIState:
@@ -19,12 +31,22 @@ class CLIState:
         self,
         *,
         user_id: int = 1,
+        offline: bool = False,
+        no_db: bool = False,
+        retries: int = 0,
     ) -> None:
         self.user_id = user_id
+        self.offline = offline
+        self.no_db = no_db
+        self.retries = retries
 
         self.has_setup_database = False
 
+        self._user: User | None = None
         self._response_cache: ResponseCache | None = None
+        self._memory_cache: MemoryResponseCache | None = None
+        self._rate_limiter: RateLimiter | None = None
+        self._download_tracker: DownloadTracker | None = None
 
     def begin(self) -> ContextManager[Session]:
         """Starts an ORM session with the database.
@@ -45,13 +67,22 @@ class CLIState:
         to fill in credentials and instead displays a warning if
         insufficient credentials are available.
 
+        The ``GRD_TOKEN`` environment variable takes precedence over
+        the token stored in the database, and is the only source of
+        credentials when the database is disabled.
+
         """
+        token = os.environ.get("GRD_TOKEN")
+        if token:
+            return token
+        elif self.no_db:
+            return None
+
         if user is None:
-            with self.begin() as session:
-                token = self.get_user(session).github_token
+            user = self.load_user()
         else:
             self._check_user(user)
-            token = user.github_token
+        token = user.github_token
 
         # NOTE: Token might be an empty string
         if token is not None and token:
@@ -59,17 +90,157 @@ class CLIState:
 
         return None
 
-    def get_response_cache(self, user: User | None = None) -> ResponseCache:
-        """Gets a response cache instance.
+    def close(self) -> None:
+        """Writes any state that was deferred until the program exits.
+
+        This records the access times and lookup statistics of the
+        response cache, and evicts responses exceeding its size limits.
+        The number of database round trips made by the command is logged.
+
+        """
+        if not self.has_setup_database:
+            return
+
+        if self._rate_limiter is not None:
+            with profiler.phase("database"):
+                self._rate_limiter.flush()
+
+        if self._response_cache is not None:
+            with profiler.phase("database"):
+                self._save_cache_state(self._response_cache)
+
+        from ..database.engine import engine_manager
+
+        round_trips = engine_manager.round_trips
+        log.info(
+            "database round trips: %d statements in %d transactions "
+            "over %d connections",
+            round_trips.statements,
+            round_trips.transactions,
+            round_trips.connections,
+        )
+
+    def get_asset_store(
+        self,
+        user: User | None = None,
+        *,
+        link_mode: LinkMode = "auto",
+    ) -> AssetStore:
+        """Gets an asset store instance.
 
         This method implicitly calls :py:meth:`setup_database()`.
 
+        Note that the store is returned even if the user has not enabled it.
+
         :param user:
             The user to take configuration values from. When providing this,
             the user ID must be the same as the :py:attr:`user_id` provided
             during class construction.
-            If None, a session will be temporarily created to retrieve
-            the current user.
+            If None, the settings from :py:meth:`load_user()` are used.
+        :param link_mode: How assets should be materialized from the store.
+
+        """
+        self.setup_database()
+
+        from ..database import store_path
+        from ..database.engine import sessionmaker
+        from ..database.store import AssetStore
+
+        if user is None:
+            user = self.load_user()
+        else:
+            self._check_user(user)
+
+        return AssetStore(
+            sessionmaker,
+            store_path,
+            max_size=user.asset_store_max_size,
+            link_mode=link_mode,
+        )
+
+    def get_download_tracker(self) -> DownloadTracker | None:
+        """Gets a download tracker instance, or None if the database
+        is disabled.
+
+        This method implicitly calls :py:meth:`setup_database()`.
+
+        """
+        if self.no_db:
+            return None
+        elif self._download_tracker is not None:
+            return self._download_tracker
+
+        self.setup_database()
+
+        from ..database.downloads import DownloadTracker
+        from ..database.engine import sessionmaker
+
+        self._download_tracker = DownloadTracker(sessionmaker)
+        return self._download_tracker
+
+    def get_retry_policy(self) -> RetryPolicy:
+        """Gets the policy for retrying requests that failed temporarily."""
+        from ..client.retry import RetryPolicy
+
+        return RetryPolicy(retries=self.retries)
+
+    def get_rate_limiter(self, token: str | None) -> RateLimiter:
+        """Gets a rate limiter for requests made with the given token.
+
+        Unless the database is disabled, this method implicitly calls
+        :py:meth:`setup_database()` so that the rate limit is shared
+        with other processes using the same token.
+
+        """
+        if self._rate_limiter is not None:
+            return self._rate_limiter
+
+        from ..client.ratelimit import RateLimiter, get_rate_limit_key
+
+        store = None
+        if not self.no_db:
+            self.setup_database()
+
+            from ..database.engine import sessionmaker
+            from ..database.ratelimits import RateLimitStore
+
+            store = RateLimitStore(sessionmaker)
+
+        self._rate_limiter = RateLimiter(get_rate_limit_key(token), store)
+        return self._rate_limiter
+
+    def get_response_cache(
+        self,
+        user: User | None = None,
+    ) -> ClientResponseCache[Any]:
+        """Gets a response cache instance to be used by clients.
+
+        This method implicitly calls :py:meth:`setup_database()`,
+        unless the database is disabled, in which case an in-memory
+        cache is returned.
+
+        :param user: See :py:meth:`get_database_cache()`.
+
+        """
+        if not self.no_db:
+            return self.get_database_cache(user)
+        elif self._memory_cache is None:
+            from ..database.memory import MemoryResponseCache
+
+            self._memory_cache = MemoryResponseCache()
+        return self._memory_cache
+
+    def get_database_cache(self, user: User | None = None) -> ResponseCache:
+        """Gets the response cache stored in the database.
+
+        This method implicitly calls :py:meth:`setup_database()`,
+        so it should not be used when the database is disabled.
+
+        :param user:
+            The user to take configuration values from. When providing this,
+            the user ID must be the same as the :py:attr:`user_id` provided
+            during class construction.
+            If None, the settings from :py:meth:`load_user()` are used.
 
         """
         if self._response_cache is not None:
@@ -82,17 +253,19 @@ class CLIState:
         from ..database.engine import sessionmaker
 
         if user is None:
-            with self.begin() as session:
-                user = self.get_user(session)
-                cache_expiry = user.cache_expiry
+            user = self.load_user()
         else:
             self._check_user(user)
-            cache_expiry = user.cache_expiry
 
         self._response_cache = ResponseCache(
             sessionmaker,
             bucket_predicate=bucket_predicate,
-            expires_after=cache_expiry,
+            # Expired responses are better than none at all while offline
+            expires_after=None if self.offline else user.cache_expiry,
+            max_age=user.cache_max_age,
+            stale_while_revalidate=user.cache_stale_while_revalidate,
+            max_size=user.cache_max_size,
+            max_entries=user.cache_max_entries,
         )
         return self._response_cache
 
@@ -107,6 +280,28 @@ class CLIState:
 
         return user
 
+    def load_user(self) -> User:
+        """Loads the current user's settings once for the rest of the command.
+
+        This method implicitly calls :py:meth:`setup_database()`.
+
+        The returned user is detached from its session, so any changes
+        made to it are not saved. To modify settings, use :py:meth:`get_user()`
+        inside :py:meth:`begin()` instead.
+
+        """
+        # Setting up the database loads the user for the response cache
+        self.setup_database()
+        if self._user is not None:
+            return self._user
+
+        with profiler.phase("database"), self.begin() as session:
+            # Keep the user's attributes loaded after the session closes
+            session.expire_on_commit = False
+            self._user = self.get_user(session)
+
+        return self._user
+
     def is_database_encrypted(self) -> bool:
         """Checks if the database is encrypted.
 
@@ -133,19 +328,29 @@ class CLIState:
         """
         if self.has_setup_database:
             return
+        elif self.no_db:
+            sys.exit("This command requires the database, which --no-db disables.")
 
-        if self.is_database_encrypted():
-            self._decrypt_database()
+        with profiler.phase("imports"):
+            # Imported separately so that SQLAlchemy's import time
+            # is not attributed to the database
+            from ..database import engine  # noqa: F401
 
-        from ..database.engine import engine_manager
+        with profiler.phase("database"):
+            if self.is_database_encrypted():
+                self._decrypt_database()
 
-        engine_manager.run_migrations()
+        with profiler.phase("migrations"):
+            from ..database.engine import engine_manager
+
+            engine_manager.run_migrations()
 
         self.has_setup_database = True
 
-        # Remove any expired responses
-        cache = self.get_response_cache()
-        cache.clear(expired=True)
+        # Remove some expired responses, amortizing the cost over many runs
+        cache = self.get_database_cache()
+        with profiler.phase("database"):
+            cache.evict_expired()
 
     def supports_encryption(self) -> bool:
         """Checks if the connection supports encryption.
@@ -160,6 +365,30 @@ class CLIState:
         with sqlite_encrypter.engine.connect() as conn:
             return sqlite_encrypter.supports_encryption(conn)
 
+    def _save_cache_state(self, cache: ResponseCache) -> None:
+        from sqlalchemy import update
+
+        from ..database.models import User
+
+        cache.flush()
+
+        hits, misses = cache.lookups()
+        if not hits and not misses:
+            return
+
+        # Increment the counters in place in case other processes
+        # are updating them at the same time
+        query = (
+            update(User)
+            .where(User.id == self.user_id)
+            .values(
+                cache_hits=User.cache_hits + hits,
+                cache_misses=User.cache_misses + misses,
+            )
+        )
+        with self.begin() as session:
+            session.execute(query)
+
     def _check_user(self, user: User | None) -> Literal[True]:
         if user is not None and user.id != self.user_id:
             raise ValueError(
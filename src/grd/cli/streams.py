@@ -1,19 +1,72 @@
 from __future__ import annotations
 
+import threading
 from typing import TYPE_CHECKING, Iterator
 
 if TYPE_CHECKING:
     from ..client.protocols import Stream
 
 
+class SharedProgress:
+    """A progress bar that can be updated by multiple streams across threads.
+
+    :param total: The combined size of every stream.
+    :param description: A description to show next to the progress bar.
+
+    """
+
+    def __init__(self, total: int, *, description: str | None = None) -> None:
+        from tqdm import tqdm
+
+        self.bar = tqdm(total=total, desc=description, unit="B", unit_scale=True)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Closes the progress bar."""
+        self.bar.close()
+
+    def update(self, n: int) -> None:
+        """Increments the progress bar by the given number of bytes."""
+        with self._lock:
+            self.bar.update(n)
+
+
 def stream_progress(stream: Stream) -> Iterator[bytes]:
     """Yields bytes from a stream while displaying a progress bar."""
-    from tqdm import tqdm
+    for _, data in stream_chunks_progress(stream):
+        yield data
+
+
+def stream_chunks_progress(
+    stream: Stream,
+    progress: SharedProgress | None = None,
+) -> Iterator[tuple[int, bytes]]:
+    """Yields (offset, bytes) chunks from a stream while displaying
+    a progress bar.
+
+    For streams downloading over multiple connections, the progress bar
+    shows the combined progress of every connection. Streams resuming
+    a previous download start from the number of bytes already downloaded.
+
+    :param progress:
+        A shared progress bar to update. If None, a progress bar
+        is created for this stream.
+
+    """
+    size = len(stream)
+    initial = size - sum(end - start for start, end in stream.ranges())
+
+    if progress is None:
+        from tqdm import tqdm
+
+        bar = tqdm(total=size, initial=initial, unit="B", unit_scale=True)
+    else:
+        bar = progress
+        bar.update(initial)
 
-    progress = tqdm(total=len(stream), unit="B", unit_scale=True)
     last = stream.progress()
-    for data in stream:
+    for chunk in stream.chunks():
         new = stream.progress()
-        progress.update(new - last)
+        bar.update(new - last)
         last = new
-        yield data
+        yield chunk
@@ -0,0 +1,672 @@
+from __future__ import annotations
+
+import contextvars
+import datetime
+import enum
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable
+
+from .streams import SharedProgress, stream_chunks_progress
+from ..client.protocols import NotModifiedError
+from ..client.retry import RetryPolicy
+from ..profiling import profiler
+
+if TYPE_CHECKING:
+    from .checksums import ReleaseChecksums
+    from ..client.models import ReleaseAsset
+    from ..client.protocols import Stream
+    from ..client.release import ReleaseClient
+    from ..database.downloads import DownloadTracker
+    from ..database.models import Download
+    from ..database.store import AssetStore
+
+log = logging.getLogger(__name__)
+
+
+class ByteRanges:
+    """A sorted set of non-overlapping (start, end) byte ranges,
+    where end is exclusive.
+    """
+
+    def __init__(self, ranges: Iterable[Iterable[int]] = ()) -> None:
+        self._ranges: list[list[int]] = []
+        for start, end in ranges:
+            self.add(start, end)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ByteRanges):
+            return NotImplemented
+        return self._ranges == other._ranges
+
+    def __iter__(self):
+        return (tuple(r) for r in self._ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def contiguous_end(self, offset: int) -> int:
+        """Returns the end of the range containing the given offset,
+        or the offset itself if it is not in any range.
+        """
+        for start, end in self._ranges:
+            if start <= offset <= end:
+                return end
+            elif start > offset:
+                break
+        return offset
+
+    def add(self, start: int, end: int) -> None:
+        """Adds a range, merging it with any adjacent or overlapping ranges."""
+        if start >= end:
+            return
+
+        # Chunks are mostly appended to the end of an existing range
+        ranges = self._ranges
+        for i in range(len(ranges) - 1, -1, -1):
+            r = ranges[i]
+            if r[0] <= start <= r[1]:
+                r[1] = max(r[1], end)
+                self._merge_from(i)
+                return
+            elif r[1] < start:
+                ranges.insert(i + 1, [start, end])
+                self._merge_from(i + 1)
+                return
+
+        ranges.insert(0, [start, end])
+        self._merge_from(0)
+
+    def missing(self, size: int) -> list[tuple[int, int]]:
+        """Returns the ranges between 0 and size that are not in this set."""
+        missing = []
+        offset = 0
+        for start, end in self._ranges:
+            if start > offset:
+                missing.append((offset, min(start, size)))
+            offset = max(offset, end)
+        if offset < size:
+            missing.append((offset, size))
+        return missing
+
+    def total(self) -> int:
+        """Returns the number of bytes covered by this set."""
+        return sum(end - start for start, end in self._ranges)
+
+    def to_list(self) -> list[list[int]]:
+        """Returns a JSON-serializable copy of the ranges."""
+        return [r.copy() for r in self._ranges]
+
+    def _merge_from(self, i: int) -> None:
+        ranges = self._ranges
+        while i + 1 < len(ranges) and ranges[i + 1][0] <= ranges[i][1]:
+            ranges[i][1] = max(ranges[i][1], ranges.pop(i + 1)[1])
+
+
+class DownloadStatus(enum.Enum):
+    """Describes how an asset was obtained."""
+
+    DOWNLOADED = "downloaded"
+    """The asset was downloaded from GitHub."""
+    STORED = "stored"
+    """The asset was materialized from the local asset store."""
+    UNCHANGED = "unchanged"
+    """The existing file is already up to date with the asset."""
+
+
+class DownloadCancelledError(Exception):
+    """Raised when a download is cancelled by :py:meth:`AssetDownloader.cancel()`."""
+
+
+class DigestMismatchError(Exception):
+    """Raised when the digest of a downloaded asset does not match
+    its expected digest.
+    """
+
+
+@dataclass
+class DownloadJob:
+    """Describes an asset to be downloaded to a path."""
+
+    owner: str
+    repo: str
+    asset: ReleaseAsset
+    path: Path
+    checksums: ReleaseChecksums | None = None
+
+
+@dataclass
+class DownloadResult:
+    """The outcome of a :py:class:`DownloadJob`."""
+
+    job: DownloadJob
+    status: DownloadStatus | None = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AssetDownloader:
+    """Downloads release assets into files.
+
+    Assets are first written to a ``.part`` file next to the destination.
+    If a download tracker is given, the progress of each download is
+    periodically saved so that interrupted downloads can be resumed
+    by only requesting the missing byte ranges. Completed downloads
+    are also recorded so that existing files can be updated only
+    when their asset has changed.
+
+    :param requester: The client to stream assets from.
+    :param connections: The number of connections to download each asset with.
+    :param tracker: The tracker to save download progress in.
+    :param store:
+        The local asset store to materialize assets from. Assets that
+        are not in the store are added to it after being downloaded.
+    :param checkpoint_interval:
+        The minimum number of seconds between saving download progress.
+    :param verify:
+        If True, the digest of each asset is computed while it is written
+        and compared against the digest listed in the release, if any.
+    :param update:
+        If True, existing files are replaced when their asset has changed
+        since they were last downloaded. Otherwise, downloading to an
+        existing file raises :py:class:`FileExistsError`.
+    :param retry_policy:
+        The policy for retrying downloads that failed with a transient
+        error, resuming from the bytes already received when possible.
+        If None, downloads are never retried.
+
+    """
+
+    def __init__(
+        self,
+        requester: ReleaseClient,
+        *,
+        connections: int = 1,
+        tracker: DownloadTracker | None = None,
+        store: AssetStore | None = None,
+        checkpoint_interval: float = 1.0,
+        verify: bool = True,
+        update: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        self.requester = requester
+        self.connections = connections
+        self.tracker = tracker
+        self.store = store
+        self.checkpoint_interval = checkpoint_interval
+        self.verify = verify
+        self.update = update
+        self.retry_policy = retry_policy or RetryPolicy(retries=0)
+
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Cancels any ongoing downloads, saving their progress."""
+        self._cancelled.set()
+
+    def download(
+        self,
+        owner: str,
+        repo: str,
+        asset: ReleaseAsset,
+        path: Path,
+        *,
+        checksums: ReleaseChecksums | None = None,
+        progress: SharedProgress | None = None,
+    ) -> DownloadStatus:
+        """Downloads an asset to the given path.
+
+        :param checksums:
+            The checksums to look up the expected digest of the asset in.
+            If None, only the asset's own digest is used.
+        :param progress:
+            A shared progress bar to update. If None, a progress bar
+            is displayed for this download.
+        :returns: How the asset was obtained.
+        :raises DigestMismatchError:
+            The downloaded asset did not match its expected digest.
+            The partially downloaded file is removed.
+        :raises DownloadCancelledError:
+            The download was cancelled by :py:meth:`cancel()`.
+        :raises FileExistsError:
+            The destination file already exists and :py:attr:`update`
+            is False.
+
+        """
+        if_none_match = None
+        if path.exists():
+            if not self.update:
+                raise FileExistsError(f"{path} already exists")
+
+            record = self._load_record(asset, path)
+            if record is not None and _is_same_asset(record, asset):
+                log.info("%s is up to date", path)
+                if progress is not None:
+                    progress.update(asset.size)
+                return DownloadStatus.UNCHANGED
+            elif record is not None:
+                if_none_match = record.etag
+
+        if self._materialize(asset, path):
+            self._complete(asset, path, etag=None)
+            if progress is not None:
+                progress.update(asset.size)
+            return DownloadStatus.STORED
+
+        expected = self._get_expected_digest(asset, checksums)
+        part_path = get_part_path(path)
+        state = self._load_state(asset, path, part_path)
+
+        if state is not None:
+            log.info("resuming download of %s", path)
+            received = ByteRanges(state.ranges)
+            missing = received.missing(state.size)
+            size: int | None = state.size
+            etag = state.etag
+            mode = "r+b"
+        else:
+            received = ByteRanges()
+            missing = None
+            size = None
+            etag = None
+            mode = "w+b"
+
+        actual: str | None = None
+        attempt = 0
+        while True:
+            started_at = time.perf_counter()
+            try:
+                with (
+                    self.requester.stream_asset(
+                        owner,
+                        repo,
+                        asset.id,
+                        connections=self.connections,
+                        ranges=missing,
+                        if_range=etag if missing is not None else None,
+                        if_none_match=if_none_match if missing is None else None,
+                    ) as stream,
+                    open(part_path, mode) as f,
+                ):
+                    restarted = ByteRanges(stream.ranges()) != ByteRanges(missing or ())
+                    if missing is not None and restarted:
+                        log.info("asset has changed since last download, restarting")
+                        received = ByteRanges()
+
+                    etag = stream.headers.get("ETag")
+                    size = len(stream)
+                    state = self._new_state(asset, path, stream)
+                    # Preallocate the file so ranges can be written at their offsets
+                    f.truncate(size)
+
+                    hasher = None
+                    if expected is not None:
+                        algorithm = expected.partition(":")[0]
+                        hasher = _StreamHasher(algorithm, f, received)
+
+                    try:
+                        self._write(f, path, stream, state, received, progress, hasher)
+                    except BaseException:
+                        self._checkpoint(f, state, received)
+                        raise
+
+                    if hasher is not None:
+                        actual = hasher.hexdigest(size)
+            except NotModifiedError:
+                log.info("%s has not been modified", path)
+                self._complete(asset, path, etag=if_none_match)
+                if progress is not None:
+                    progress.update(asset.size)
+                return DownloadStatus.UNCHANGED
+            except Exception as e:
+                elapsed = time.perf_counter() - started_at
+                if not self.retry_policy.should_retry(attempt, e):
+                    raise
+
+                delay = self.retry_policy.get_delay(attempt, e)
+                log.warning(
+                    "download of %s failed after %.0f ms (attempt %d of %d): %s, "
+                    "retrying in %.1fs",
+                    path,
+                    elapsed * 1000,
+                    attempt + 1,
+                    self.retry_policy.retries + 1,
+                    e,
+                    delay,
+                )
+            else:
+                log.debug(
+                    "downloaded %s in %.0f ms (attempt %d)",
+                    path,
+                    (time.perf_counter() - started_at) * 1000,
+                    attempt + 1,
+                )
+                break
+
+            if progress is not None:
+                # The next attempt counts every byte already received again
+                progress.update(-received.total())
+
+            if size is not None and etag is not None and not etag.startswith("W/"):
+                # Resume with a range request for whatever is still missing
+                missing = received.missing(size) if len(received) else None
+            else:
+                received = ByteRanges()
+                missing = None
+            mode = "w+b" if missing is None else "r+b"
+
+            attempt += 1
+            if self._cancelled.wait(delay):
+                raise DownloadCancelledError(f"Download of {path} was cancelled")
+
+        if expected is not None and actual != expected.partition(":")[2].lower():
+            part_path.unlink(missing_ok=True)
+            if self.tracker is not None and state is not None:
+                self.tracker.discard(state.path)
+            raise DigestMismatchError(
+                f"Digest of {path.name} does not match {expected} (got {actual})"
+            )
+
+        if path.exists() and not self.update:
+            raise FileExistsError(f"{path} already exists")
+
+        part_path.replace(path)
+        self._complete(asset, path, etag=etag)
+
+        if self.store is not None:
+            try:
+                self.store.add(asset, path)
+            except OSError as e:
+                log.warning("could not add %s to the asset store: %s", path, e)
+
+        return DownloadStatus.DOWNLOADED
+
+    def _write(
+        self,
+        f: BinaryIO,
+        path: Path,
+        stream: Stream,
+        state: Download | None,
+        received: ByteRanges,
+        progress: SharedProgress | None,
+        hasher: _StreamHasher | None,
+    ) -> None:
+        last_checkpoint = time.monotonic()
+        chunks = stream_chunks_progress(stream, progress)
+        for offset, data in profiler.iterate("http", chunks):
+            if self._cancelled.is_set():
+                raise DownloadCancelledError(f"Download of {path} was cancelled")
+
+            with profiler.phase("write"):
+                if f.tell() != offset:
+                    f.seek(offset)
+                f.write(data)
+                received.add(offset, offset + len(data))
+                if hasher is not None:
+                    hasher.update(offset, data)
+
+            now = time.monotonic()
+            if now - last_checkpoint >= self.checkpoint_interval:
+                self._checkpoint(f, state, received)
+                last_checkpoint = now
+
+    def download_many(
+        self,
+        jobs: Iterable[DownloadJob],
+        *,
+        workers: int,
+    ) -> list[DownloadResult]:
+        """Downloads multiple assets concurrently with a combined progress bar.
+
+        Exceptions raised by each download are stored in the results
+        rather than propagated. If the calling thread is interrupted,
+        all downloads are cancelled.
+
+        :param workers: The maximum number of assets to download at once.
+        :returns: The results of each job in the same order they were given.
+
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        total = sum(job.asset.size for job in jobs)
+        progress = SharedProgress(total, description=f"{len(jobs)} assets")
+
+        def run(job: DownloadJob) -> DownloadResult:
+            try:
+                status = self.download(
+                    job.owner,
+                    job.repo,
+                    job.asset,
+                    job.path,
+                    checksums=job.checksums,
+                    progress=progress,
+                )
+            except Exception as e:
+                log.debug("failed to download %s", job.path, exc_info=True)
+                return DownloadResult(job, error=e)
+            return DownloadResult(job, status=status)
+
+        executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="grd-download",
+        )
+        try:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run, job)
+                for job in jobs
+            ]
+            return [fut.result() for fut in futures]
+        except BaseException:
+            self.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            progress.close()
+
+    def _checkpoint(
+        self,
+        f: BinaryIO,
+        state: Download | None,
+        received: ByteRanges,
+    ) -> None:
+        if self.tracker is None or state is None:
+            return
+
+        # The saved ranges must never be ahead of what's on disk
+        f.flush()
+        os.fsync(f.fileno())
+
+        state.ranges = received.to_list()
+        self.tracker.save(state)
+
+    def _complete(self, asset: ReleaseAsset, path: Path, *, etag: str | None) -> None:
+        if self.tracker is None:
+            return
+
+        from ..database.models import Download
+
+        self.tracker.save(
+            Download(
+                path=str(path.resolve()),
+                asset_id=asset.id,
+                size=path.stat().st_size,
+                etag=etag,
+                asset_updated_at=asset.updated_at,
+                completed_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+
+    def _get_expected_digest(
+        self,
+        asset: ReleaseAsset,
+        checksums: ReleaseChecksums | None,
+    ) -> str | None:
+        if not self.verify:
+            return None
+
+        digest = checksums.get(asset) if checksums is not None else asset.digest
+        if digest is None:
+            log.debug("no digest available for %s", asset.name)
+            return None
+
+        algorithm = digest.partition(":")[0]
+        if algorithm not in hashlib.algorithms_available:
+            log.warning("cannot verify %s with unknown digest %s", asset.name, digest)
+            return None
+
+        return digest
+
+    def _load_state(
+        self,
+        asset: ReleaseAsset,
+        path: Path,
+        part_path: Path,
+    ) -> Download | None:
+        if self.tracker is None:
+            return None
+
+        state = self.tracker.get(str(path.resolve()))
+        if state is None or state.completed_at is not None:
+            return None
+        elif state.asset_id != asset.id:
+            log.debug("previous download was for a different asset")
+        elif state.etag is None or state.etag.startswith("W/"):
+            log.debug("previous download cannot be resumed without a strong ETag")
+        elif not part_path.is_file() or part_path.stat().st_size != state.size:
+            log.debug("partial file is missing or has an unexpected size")
+        else:
+            return state
+
+        self.tracker.discard(state.path)
+        return None
+
+    def _load_record(self, asset: ReleaseAsset, path: Path) -> Download | None:
+        if self.tracker is None:
+            return None
+
+        record = self.tracker.get(str(path.resolve()))
+        if record is None or record.completed_at is None:
+            return None
+
+        stat = path.stat()
+        if record.asset_id != asset.id:
+            log.debug("file was previously downloaded from a different asset")
+        elif stat.st_size != record.size:
+            log.debug("file size has changed since it was downloaded")
+        elif stat.st_mtime > record.completed_at.timestamp():
+            log.debug("file was modified since it was downloaded")
+        else:
+            return record
+
+        return None
+
+    def _materialize(self, asset: ReleaseAsset, path: Path) -> bool:
+        if self.store is None:
+            return False
+        elif not path.exists():
+            return self.store.materialize(asset, path)
+
+        # Replace the existing file atomically
+        temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp.unlink(missing_ok=True)
+        if not self.store.materialize(asset, temp):
+            return False
+
+        temp.replace(path)
+        return True
+
+    def _new_state(
+        self,
+        asset: ReleaseAsset,
+        path: Path,
+        stream: Stream,
+    ) -> Download | None:
+        if self.tracker is None:
+            # Avoid importing the database models when nothing is tracked
+            return None
+
+        from ..database.models import Download
+
+        return Download(
+            path=str(path.resolve()),
+            asset_id=asset.id,
+            size=len(stream),
+            etag=stream.headers.get("ETag"),
+        )
+
+
+def _is_same_asset(record: Download, asset: ReleaseAsset) -> bool:
+    return (
+        asset.updated_at is not None
+        and record.asset_updated_at == asset.updated_at
+        and record.size == asset.size
+    )
+
+
+class _StreamHasher:
+    """Hashes a file in order while its chunks are being written.
+
+    Chunks written at the current hashing offset are hashed directly
+    from memory. Chunks written out of order, such as those received
+    over multiple connections or kept from a resumed download, are read
+    back from the file once every byte before them has been hashed.
+
+    Each chunk must be written to the file and added to the received
+    ranges before calling :py:meth:`update()`.
+
+    """
+
+    def __init__(self, algorithm: str, f: BinaryIO, received: ByteRanges) -> None:
+        self.hash = hashlib.new(algorithm)
+        self.f = f
+        self.received = received
+        self.offset = 0
+
+    def hexdigest(self, size: int) -> str:
+        """Hashes any remaining bytes up to the given size and
+        returns the digest.
+        """
+        self._read_until(size)
+        return self.hash.hexdigest()
+
+    def update(self, offset: int, data: bytes) -> None:
+        if offset > self.offset:
+            if self.received.contiguous_end(self.offset) < offset:
+                return
+            self._read_until(offset)
+
+        if offset == self.offset:
+            self.hash.update(data)
+            self.offset += len(data)
+
+        self._read_until(self.received.contiguous_end(self.offset))
+
+    def _read_until(self, end: int) -> None:
+        if end <= self.offset:
+            return
+
+        position = self.f.tell()
+        self.f.seek(self.offset)
+        while self.offset < end:
+            data = self.f.read(min(end - self.offset, 1024 * 1024))
+            if not data:
+                raise EOFError(f"Expected {end} bytes but file ended early")
+            self.hash.update(data)
+            self.offset += len(data)
+        self.f.seek(position)
+
+
+def get_part_path(path: Path) -> Path:
+    """Returns the path that a file is written to while it is downloading."""
+    return path.with_name(path.name + ".part")
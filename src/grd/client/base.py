@@ -1,21 +1,260 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import TYPE_CHECKING, Any, Mapping
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
 
 from .dates import format_http_date, maybe_parse_http_date
+from .http import OfflineError
+from .ratelimit import DEFAULT_RESOURCE
+from .retry import RetryPolicy
 
 if TYPE_CHECKING:
     import httpx
 
-    from .release import ReleaseClient
-    from ..database.cache import ResponseCache
-    from ..database.models import Response
+    from .cache import Response, ResponseCache
+    from .pagination import Page
+    from .ratelimit import RateLimiter
+    from .release import AsyncReleaseClient, ReleaseClient
 
 log = logging.getLogger(__name__)
 
+_Request = tuple[str, str, tuple, dict[str, Any]]
+"""The method, url, positional and keyword arguments of a request."""
 
-class BaseClient:
+
+@dataclass
+class _Attempts:
+    """Counts the times a request was sent again."""
+
+    retried: int = 0
+    """The number of retries after transient errors."""
+    rate_limited: int = 0
+    """The number of retries after being rate limited."""
+
+
+class CacheMissError(OfflineError):
+    """Raised when a response is not cached while in offline mode.
+
+    :param keys: The cache keys that were missing.
+
+    """
+
+    def __init__(self, keys: list[str]) -> None:
+        self.keys = keys
+        super().__init__(f"Not available in the cache: {', '.join(keys)}")
+
+
+class _CachingMixin:
+    """Implements the response caching shared by :py:class:`BaseClient`
+    and :py:class:`AsyncBaseClient`.
+    """
+
+    JSON_HEADERS = {"Accept": "application/vnd.github+json"}
+
+    cache: ResponseCache[Any]
+
+    def __init__(
+        self,
+        cache: ResponseCache[Any],
+        offline: bool,
+        rate_limiter: RateLimiter | None,
+        retry_policy: RetryPolicy | None,
+    ) -> None:
+        self.cache = cache
+        self.offline = offline
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy(retries=0)
+        self._stale: dict[str, _Request] = {}
+        self._stale_lock = threading.Lock()
+
+    def _check_freshness(
+        self,
+        key: str,
+        cached: Response | None,
+        request: _Request,
+    ) -> bool:
+        """Checks if a cached response can be returned without a request.
+
+        Stale responses are queued to be revalidated later by
+        ``revalidate_stale()``.
+
+        :raises CacheMissError:
+            The client is offline and the response is not cached.
+
+        """
+        from ..database.memory import Freshness
+
+        if self.offline:
+            if cached is None:
+                raise CacheMissError([key])
+            log.debug("using cache key while offline: %s", key)
+            return True
+        elif cached is None:
+            return False
+
+        freshness = self.cache.freshness(cached)
+        if freshness == Freshness.FRESH:
+            log.debug("cache key is fresh: %s", key)
+            return True
+        elif freshness == Freshness.STALE:
+            log.debug("cache key is stale, revalidating later: %s", key)
+            with self._stale_lock:
+                self._stale[key] = request
+            return True
+        return False
+
+    def _pop_stale(self) -> list[_Request]:
+        with self._stale_lock:
+            stale = list(self._stale.values())
+            self._stale.clear()
+        return stale
+
+    def _update_cache(
+        self,
+        key: str,
+        content: bytes,
+        headers: Mapping[str, str] = {},
+    ) -> None:
+        """Updates the cache for a particular response.
+
+        Reference:
+            https://docs.github.com/en/rest/overview/resources-in-the-rest-api#conditional-requests
+
+        """
+        date = maybe_parse_http_date(headers.get("Last-Modified"))
+        etag = headers.get("ETag")
+        self.cache.set(key, content, modified_at=date, etag=etag)
+
+    @staticmethod
+    def _add_cache_headers(headers: dict[str, Any], cached: Response) -> None:
+        """Mutates the headers according to the cached response to make it
+        a conditional request.
+        """
+        if cached.etag is not None:
+            log.debug("using ETag for conditional request")
+            headers["If-None-Match"] = cached.etag
+        elif cached.modified_at is not None:
+            log.debug("using modified_at date for conditional request")
+            headers["If-Modified-Since"] = format_http_date(cached.modified_at)
+        else:
+            log.debug("using created_at date for conditional request")
+            headers["If-Modified-Since"] = format_http_date(cached.created_at)
+
+    def _get_send_delay(
+        self,
+        url: str,
+        attempts: _Attempts,
+        elapsed: float,
+        result: httpx.Response | Exception,
+    ) -> float | None:
+        """Decides if a request should be sent again after the given result.
+
+        :param attempts: The attempts made so far, which are updated in place.
+        :param elapsed: The number of seconds taken by the last attempt.
+        :returns:
+            The number of seconds to wait before sending the request again,
+            or None if the result should be returned or raised.
+
+        """
+        delay = self._get_rate_limit_delay(url, attempts.rate_limited, result)
+        if delay is not None:
+            attempts.rate_limited += 1
+            return delay
+
+        delay = self._get_retry_delay(url, attempts.retried, elapsed, result)
+        if delay is not None:
+            attempts.retried += 1
+        return delay
+
+    def _get_rate_limit_delay(
+        self,
+        url: str,
+        rate_limited: int,
+        result: httpx.Response | Exception,
+    ) -> float | None:
+        """Records the rate limit of a response, returning the number of
+        seconds to wait before retrying it if it was rate limited.
+        """
+        import httpx
+
+        from .ratelimit import MAX_RATE_LIMIT_RETRIES
+
+        if self.rate_limiter is None or not isinstance(result, httpx.Response):
+            return None
+
+        delay = self.rate_limiter.update(result)
+        if delay is None or rate_limited >= MAX_RATE_LIMIT_RETRIES:
+            return None
+
+        log.warning("rate limited on %s, retrying in %.0f seconds", url, delay)
+        return delay
+
+    def _get_retry_delay(
+        self,
+        url: str,
+        attempt: int,
+        elapsed: float,
+        result: httpx.Response | Exception,
+    ) -> float | None:
+        """Logs an attempt at a request, returning the number of seconds
+        to wait before retrying it if it failed with a transient error.
+        """
+        import httpx
+
+        if isinstance(result, httpx.Response):
+            log.debug(
+                "%s %s: %d in %.0f ms (attempt %d)",
+                result.request.method,
+                url,
+                result.status_code,
+                elapsed * 1000,
+                attempt + 1,
+            )
+            if not result.is_error:
+                return None
+
+            error: Exception = httpx.HTTPStatusError(
+                f"{result.status_code} {result.reason_phrase}",
+                request=result.request,
+                response=result,
+            )
+        else:
+            error = result
+
+        if not self.retry_policy.should_retry(attempt, error):
+            return None
+
+        delay = self.retry_policy.get_delay(attempt, error)
+        log.warning(
+            "%s failed after %.0f ms (attempt %d of %d): %s, retrying in %.1fs",
+            url,
+            elapsed * 1000,
+            attempt + 1,
+            self.retry_policy.retries + 1,
+            error,
+            delay,
+        )
+        return delay
+
+    @staticmethod
+    def _is_conditional(headers: Mapping[str, Any]) -> bool:
+        """Checks if a request may be answered with 304 Not Modified,
+        which does not count against the rate limit.
+        """
+        return "If-None-Match" in headers or "If-Modified-Since" in headers
+
+    @staticmethod
+    def _get_cache_key(method: str, url: str) -> str:
+        """Creates a cache identifier for the given method and url."""
+        return f"{method} {url}"
+
+
+class BaseClient(_CachingMixin):
     """The base client for making API requests to GitHub.
 
     :param client:
@@ -23,31 +262,116 @@ class BaseClient:
         :py:func:`create_client()`.
     :param cache:
         The cache to fetch and store responses in.
+    :param offline:
+        If True, responses are served only from the cache regardless of
+        their freshness, and :py:exc:`CacheMissError` is raised for
+        any response that is not cached.
+    :param rate_limiter:
+        The scheduler to pace requests with according to GitHub's
+        rate limits. If None, requests are sent immediately.
+    :param retry_policy:
+        The policy for retrying requests that failed with a transient
+        error. If None, requests are never retried.
 
     """
 
-    JSON_HEADERS = {"Accept": "application/vnd.github+json"}
-
     def __init__(
         self,
         *,
         client: httpx.Client,
-        cache: ResponseCache,
+        cache: ResponseCache[Any],
+        offline: bool = False,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
     ):
+        super().__init__(cache, offline, rate_limiter, retry_policy)
         self.client = client
-        self.cache = cache
 
     def get_release_client(self) -> ReleaseClient:
         from .release import ReleaseClient
 
         return ReleaseClient(self)
 
+    def prefetch(self, method: str, urls: Iterable[str]) -> None:
+        """Loads the cached responses for many endpoints at once,
+        so that subsequent calls to :py:meth:`cached_request()`
+        do not need to query the database individually.
+        """
+        self.cache.get_many(self._get_cache_key(method, url) for url in urls)
+
+    def get_cached_contents(
+        self,
+        method: str,
+        urls: Iterable[str],
+        *,
+        headers: Mapping[str, Any] = {},
+    ) -> dict[str, bytes]:
+        """Returns the cached bodies that :py:meth:`cached_request_content()`
+        would return without making a request, keyed by their URL.
+
+        Stale responses are included and revalidated by
+        :py:meth:`revalidate_stale()` with the given headers.
+
+        """
+        keys = {url: self._get_cache_key(method, url) for url in urls}
+        cached = self.cache.get_many(keys.values())
+
+        contents = {}
+        for url, key in keys.items():
+            response = cached.get(key)
+            if response is None:
+                continue
+
+            request = (method, url, (), {"headers": headers})
+            if self._check_freshness(key, response, request):
+                contents[url] = response.content
+        return contents
+
+    def set_cached_content(self, method: str, url: str, content: bytes) -> None:
+        """Caches a body for the given endpoint that was obtained
+        some other way, such as from a GraphQL query.
+
+        Since it has no ETag, the next request to the endpoint will
+        be made conditional on its creation date instead.
+
+        """
+        self._update_cache(self._get_cache_key(method, url), content)
+
+    def graphql(self, query: str, variables: Mapping[str, Any] = {}) -> Any:
+        """Sends a query to GitHub's GraphQL API and returns its data.
+
+        Responses are not cached. Errors for parts of the query are
+        ignored, leaving those parts of the data as null.
+
+        :raises GraphQLError: The query failed without returning any data.
+
+        """
+        from .graphql import GraphQLError
+
+        response = self._send(
+            "POST",
+            "/graphql",
+            headers={},
+            json={"query": query, "variables": variables},
+            resource="graphql",
+        )
+        response.raise_for_status()
+
+        payload = response.json()
+        errors = payload.get("errors") or []
+        if payload.get("data") is None:
+            raise GraphQLError(errors)
+
+        for error in errors:
+            log.debug("GraphQL error: %s", error.get("message", error))
+        return payload["data"]
+
     def cached_request(
         self,
         method: str,
         url: str,
         *args,
-        headers: dict[str, Any] = {},
+        headers: Mapping[str, Any] = {},
         **kwargs,
     ) -> Any:
         """Requests a potentially cached JSON response from the given endpoint.
@@ -55,56 +379,357 @@ class BaseClient:
         Extra arguments are passed to :py:meth:`httpx.Client.request()`.
 
         """
+        content = self.cached_request_content(
+            method, url, *args, headers=headers, **kwargs
+        )
+        return json.loads(content)
+
+    def cached_request_content(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> bytes:
+        """Requests a potentially cached response body from the given endpoint.
+
+        Unlike :py:meth:`cached_request()`, the body is not decoded,
+        allowing it to be parsed directly into a model.
+
+        If the cached response is within the cache's freshness window,
+        it is returned without making any request. Stale responses are
+        also returned immediately and revalidated by :py:meth:`revalidate_stale()`.
+        In offline mode, only the cache is used.
+
+        Extra arguments are passed to :py:meth:`httpx.Client.request()`.
+
+        """
+        key = self._get_cache_key(method, url)
+        cache = self.cache.get(key)
+        request = (method, url, args, {**kwargs, "headers": headers})
+        if self._check_freshness(key, cache, request):
+            assert cache is not None
+            return cache.content
+
+        return self._request_content(
+            key, cache, method, url, *args, headers=headers, **kwargs
+        )
+
+    def cached_request_page(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> Page:
+        """Requests a potentially cached page from a paginated endpoint.
+
+        This behaves like :py:meth:`cached_request_content()`, but also
+        returns the links to the other pages when the page was not
+        answered from the cache.
+
+        """
+        from .pagination import Page
+
         key = self._get_cache_key(method, url)
         cache = self.cache.get(key)
+        request = (method, url, args, {**kwargs, "headers": headers})
+        if self._check_freshness(key, cache, request):
+            assert cache is not None
+            return Page(cache.content)
+
+        return self._request_page(
+            key, cache, method, url, *args, headers=headers, **kwargs
+        )
+
+    def revalidate_stale(self, *, workers: int = 1) -> None:
+        """Revalidates every stale response that was returned
+        by :py:meth:`cached_request_content()`.
+
+        Errors are logged and otherwise ignored, since the stale
+        responses have already been used.
+
+        :param workers: The number of requests to make concurrently.
+
+        """
+        import concurrent.futures
+        import contextvars
+
+        def revalidate(method: str, url: str, args: tuple, kwargs: dict) -> None:
+            key = self._get_cache_key(method, url)
+            try:
+                self._request_content(
+                    key, self.cache.get(key), method, url, *args, **kwargs
+                )
+            except Exception as e:
+                log.warning("could not revalidate %s: %s", url, e)
+
+        stale = self._pop_stale()
+        if not stale:
+            return
+
+        log.debug("revalidating %d stale responses", len(stale))
+        if workers <= 1:
+            for request in stale:
+                revalidate(*request)
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, revalidate, *request)
+                for request in stale
+            ]
+            concurrent.futures.wait(futures)
+
+    def _request_content(
+        self,
+        key: str,
+        cache: Response | None,
+        method: str,
+        url: str,
+        *args,
+        **kwargs,
+    ) -> bytes:
+        return self._request_page(key, cache, method, url, *args, **kwargs).content
+
+    def _request_page(
+        self,
+        key: str,
+        cache: Response | None,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> Page:
+        from .pagination import Page, parse_link_header
+
+        headers = dict(headers)
         if cache is not None:
             self._add_cache_headers(headers, cache)
 
-        response = self.client.request(method, url, *args, headers=headers, **kwargs)
+        response = self._send(method, url, *args, headers=headers, **kwargs)
 
         if response.status_code == 304:
             assert cache is not None
-            return cache.value
+            self.cache.mark_validated(cache)
+            return Page(cache.content, parse_link_header(response.headers) or None)
         else:
             response.raise_for_status()
 
-        data = response.json()
-        self._update_cache(key, data, response.headers)
+        self._update_cache(key, response.content, response.headers)
 
-        return data
+        return Page(response.content, parse_link_header(response.headers))
 
-    def _update_cache(
+    def _send(
         self,
-        key: str,
-        value: Any,
-        headers: Mapping[str, str] = {},
-    ) -> None:
-        """Updates the cache for a particular response.
+        method: str,
+        url: str,
+        *args,
+        headers: dict[str, Any],
+        resource: str = DEFAULT_RESOURCE,
+        **kwargs,
+    ) -> httpx.Response:
+        import httpx
 
-        Reference:
-            https://docs.github.com/en/rest/overview/resources-in-the-rest-api#conditional-requests
+        conditional = self._is_conditional(headers)
+        attempts = _Attempts()
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(conditional=conditional, resource=resource)
+
+            start = time.perf_counter()
+            result: httpx.Response | Exception
+            try:
+                result = self.client.request(
+                    method, url, *args, headers=headers, **kwargs
+                )
+            except httpx.TransportError as e:
+                result = e
+            elapsed = time.perf_counter() - start
+
+            delay = self._get_send_delay(url, attempts, elapsed, result)
+            if delay is None:
+                if isinstance(result, Exception):
+                    raise result
+                return result
+
+            time.sleep(delay)
+
+
+class AsyncBaseClient(_CachingMixin):
+    """The asynchronous equivalent of :py:class:`BaseClient`.
+
+    Responses are stored in the same :py:class:`ResponseCache` as the
+    synchronous client. Since the cache is synchronous, lookups are run
+    in a separate thread to avoid blocking the event loop.
+
+    :param client:
+        The client to use for making requests. This should be created from
+        :py:func:`create_async_client()`.
+    :param cache:
+        The cache to fetch and store responses in.
+    :param offline:
+        If True, responses are served only from the cache.
+        See :py:class:`BaseClient` for details.
+    :param rate_limiter:
+        The scheduler to pace requests with.
+        See :py:class:`BaseClient` for details.
+    :param retry_policy:
+        The policy for retrying requests.
+        See :py:class:`BaseClient` for details.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        client: httpx.AsyncClient,
+        cache: ResponseCache[Any],
+        offline: bool = False,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        super().__init__(cache, offline, rate_limiter, retry_policy)
+        self.client = client
+
+    def get_release_client(self) -> AsyncReleaseClient:
+        from .release import AsyncReleaseClient
+
+        return AsyncReleaseClient(self)
+
+    async def cached_request(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> Any:
+        """Requests a potentially cached JSON response from the given endpoint.
+
+        Extra arguments are passed to :py:meth:`httpx.AsyncClient.request()`.
 
         """
-        date = maybe_parse_http_date(headers.get("Last-Modified"))
-        etag = headers.get("ETag")
-        self.cache.set(key, value, modified_at=date, etag=etag)
+        content = await self.cached_request_content(
+            method, url, *args, headers=headers, **kwargs
+        )
+        return json.loads(content)
+
+    async def cached_request_content(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> bytes:
+        """Requests a potentially cached response body from the given endpoint.
+
+        Extra arguments are passed to :py:meth:`httpx.AsyncClient.request()`.
 
-    @staticmethod
-    def _add_cache_headers(headers: dict[str, Any], cached: Response) -> None:
-        """Mutates the headers according to the cached response to make it
-        a conditional request.
         """
-        if cached.etag is not None:
-            log.debug("using ETag for conditional request")
-            headers["If-None-Match"] = cached.etag
-        elif cached.modified_at is not None:
-            log.debug("using modified_at date for conditional request")
-            headers["If-Modified-Since"] = format_http_date(cached.modified_at)
+        key = self._get_cache_key(method, url)
+        cache = await asyncio.to_thread(self.cache.get, key)
+        request = (method, url, args, {**kwargs, "headers": headers})
+        if self._check_freshness(key, cache, request):
+            assert cache is not None
+            return cache.content
+
+        return await self._request_content(
+            key, cache, method, url, *args, headers=headers, **kwargs
+        )
+
+    async def revalidate_stale(self) -> None:
+        """Concurrently revalidates every stale response that was returned
+        by :py:meth:`cached_request_content()`.
+
+        Errors are logged and otherwise ignored, since the stale
+        responses have already been used.
+
+        """
+
+        async def revalidate(method: str, url: str, args: tuple, kwargs: dict) -> None:
+            key = self._get_cache_key(method, url)
+            try:
+                cache = await asyncio.to_thread(self.cache.get, key)
+                await self._request_content(key, cache, method, url, *args, **kwargs)
+            except Exception as e:
+                log.warning("could not revalidate %s: %s", url, e)
+
+        stale = self._pop_stale()
+        if stale:
+            log.debug("revalidating %d stale responses", len(stale))
+            await asyncio.gather(*(revalidate(*request) for request in stale))
+
+    async def _request_content(
+        self,
+        key: str,
+        cache: Response | None,
+        method: str,
+        url: str,
+        *args,
+        headers: Mapping[str, Any] = {},
+        **kwargs,
+    ) -> bytes:
+        headers = dict(headers)
+        if cache is not None:
+            self._add_cache_headers(headers, cache)
+
+        response = await self._send(method, url, *args, headers=headers, **kwargs)
+
+        if response.status_code == 304:
+            assert cache is not None
+            await asyncio.to_thread(self.cache.mark_validated, cache)
+            return cache.content
         else:
-            log.debug("using created_at date for conditional request")
-            headers["If-Modified-Since"] = format_http_date(cached.created_at)
+            response.raise_for_status()
 
-    @staticmethod
-    def _get_cache_key(method: str, url: str) -> str:
-        """Creates a cache identifier for the given method and url."""
-        return f"{method} {url}"
+        await asyncio.to_thread(
+            self._update_cache, key, response.content, response.headers
+        )
+
+        return response.content
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: dict[str, Any],
+        resource: str = DEFAULT_RESOURCE,
+        **kwargs,
+    ) -> httpx.Response:
+        import httpx
+
+        conditional = self._is_conditional(headers)
+        attempts = _Attempts()
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.async_acquire(
+                    conditional=conditional,
+                    resource=resource,
+                )
+
+            start = time.perf_counter()
+            result: httpx.Response | Exception
+            try:
+                result = await self.client.request(
+                    method, url, *args, headers=headers, **kwargs
+                )
+            except httpx.TransportError as e:
+                result = e
+            elapsed = time.perf_counter() - start
+
+            # Recording the rate limit may write to the database
+            delay = await asyncio.to_thread(
+                self._get_send_delay, url, attempts, elapsed, result
+            )
+            if delay is None:
+                if isinstance(result, Exception):
+                    raise result
+                return result
+
+            await asyncio.sleep(delay)
@@ -1,10 +1,94 @@
+from __future__ import annotations
+
+import datetime
+from typing import TYPE_CHECKING, ContextManager, Iterable, Protocol, TypeVar
+
+if TYPE_CHECKING:
+    from ..database.memory import Freshness
+
+R = TypeVar("R", bound="Response")
+
+
+class Response(Protocol):
+    """The attributes of a cached response used by clients.
+
+    This is implemented by :py:class:`~grd.database.models.Response`
+    and :py:class:`~grd.database.memory.CachedResponse`.
+
+    """
+
+    @property
+    def content(self) -> bytes:
+        """The response body."""
+        ...
+
+    @property
+    def etag(self) -> str | None:
+        ...
+
+    @property
+    def modified_at(self) -> datetime.datetime | None:
+        ...
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        ...
+
+    @property
+    def validated_at(self) -> datetime.datetime | None:
+        ...
+
+
+class ResponseCache(Protocol[R]):
+    """The methods of a response cache used by clients and commands.
+
+    This is implemented by :py:class:`~grd.database.cache.ResponseCache`
+    and :py:class:`~grd.database.memory.MemoryResponseCache`, which store
+    different types of responses.
+
+    """
+
+    def bucket(self) -> ContextManager[set[str]]:
+        ...
+
+    def deferred(self) -> ContextManager[None]:
+        ...
+
+    def freshness(self, response: R) -> Freshness:
+        ...
+
+    def get(self, key: str) -> R | None:
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, R]:
+        ...
+
+    def mark_validated(self, response: R) -> None:
+        ...
+
+    def set(
+        self,
+        key: str,
+        content: bytes,
+        *,
+        modified_at: datetime.datetime | None = None,
+        etag: str | None = None,
+    ) -> None:
+        ...
+
+
 def bucket_predicate(exc: Exception) -> bool:
     """The predicate function that should be used when creating a
-    :py:class:`ResponseCache` to be used by the client.
+    :py:class:`~grd.database.cache.ResponseCache` to be used by the client.
     """
     import httpx
 
-    if not isinstance(exc, httpx.HTTPStatusError):
+    from .http import OfflineError
+
+    # Cached responses are still valid when the network was never used
+    if isinstance(exc, OfflineError):
+        return True
+    elif not isinstance(exc, httpx.HTTPStatusError):
         return False
 
     status = exc.response.status_code
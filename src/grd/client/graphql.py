@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Any
+
+GRAPHQL_BATCH_SIZE = 50
+"""The number of repositories looked up by each GraphQL query.
+
+Each repository requests up to :py:data:`GRAPHQL_ASSETS_PER_RELEASE`
+assets, so a batch stays far below GitHub's limit of 500,000 nodes
+per query while costing a single point of the GraphQL rate limit.
+
+"""
+
+GRAPHQL_ASSETS_PER_RELEASE = 100
+"""The number of assets requested for each release, which is the most
+GitHub allows. Releases with more assets must be fetched with REST."""
+
+_RELEASE_FIELDS = f"""
+      databaseId
+      name
+      tagName
+      isPrerelease
+      publishedAt
+      releaseAssets(first: {GRAPHQL_ASSETS_PER_RELEASE}) {{
+        pageInfo {{ hasNextPage }}
+        nodes {{ databaseId name size updatedAt digest }}
+      }}
+"""
+
+
+class GraphQLError(Exception):
+    """Raised when a GraphQL query fails without returning any data.
+
+    :param errors: The errors returned by the server.
+
+    """
+
+    def __init__(self, errors: list[dict[str, Any]]) -> None:
+        self.errors = errors
+        messages = [str(e.get("message", e)) for e in errors]
+        super().__init__("; ".join(messages) or "GraphQL query returned no data")
+
+
+def build_latest_releases_query(count: int) -> str:
+    """Builds a query for the latest release of many repositories.
+
+    Each repository is aliased as ``r<i>`` and takes its owner and name
+    from the ``$owner<i>`` and ``$name<i>`` variables.
+
+    """
+    params = ", ".join(f"$owner{i}: String!, $name{i}: String!" for i in range(count))
+    lookups = "".join(
+        f"  r{i}: repository(owner: $owner{i}, name: $name{i}) {{\n"
+        f"    latestRelease {{{_RELEASE_FIELDS}    }}\n"
+        f"  }}\n"
+        for i in range(count)
+    )
+    return f"query({params}) {{\n{lookups}}}\n"
+
+
+def to_rest_release(node: dict[str, Any]) -> dict[str, Any] | None:
+    """Converts a release from GraphQL into the shape returned by REST.
+
+    :returns:
+        The release, or None if not all of its assets were included
+        in the response.
+
+    """
+    assets = node["releaseAssets"]
+    if assets["pageInfo"]["hasNextPage"]:
+        return None
+
+    return {
+        "id": node["databaseId"],
+        "name": node["name"] or "",
+        "tag_name": node["tagName"],
+        "prerelease": node["isPrerelease"],
+        "published_at": node["publishedAt"],
+        "assets": [
+            {
+                "id": asset["databaseId"],
+                "name": asset["name"],
+                "size": asset["size"],
+                "updated_at": asset["updatedAt"],
+                "digest": asset.get("digest"),
+            }
+            for asset in assets["nodes"]
+        ],
+    }
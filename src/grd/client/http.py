@@ -1,8 +1,10 @@
 import sys
+import time
 
 import httpx
 
 from .. import __qualname__, __version__, __url__
+from ..profiling import profiler
 
 BASE = "https://api.github.com"
 HEADERS = {
@@ -15,10 +17,91 @@ HEADERS = {
 }
 
 
-def create_client(*, token: str | None = None) -> httpx.Client:
-    """Returns a :py:class:`httpx.Client` prepared for making GitHub requests."""
+class OfflineError(Exception):
+    """Raised when a request is made by a client created in offline mode."""
+
+
+class _OfflineTransport(httpx.BaseTransport):
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        raise OfflineError(f"Cannot request {request.url} while offline")
+
+
+class _AsyncOfflineTransport(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        raise OfflineError(f"Cannot request {request.url} while offline")
+
+
+def create_client(
+    *,
+    token: str | None = None,
+    offline: bool = False,
+    **kwargs,
+) -> httpx.Client:
+    """Returns a :py:class:`httpx.Client` prepared for making GitHub requests.
+
+    If offline is True, every request made by the client raises
+    :py:exc:`OfflineError` instead of touching the network.
+
+    Extra arguments are passed to :py:class:`httpx.Client`.
+
+    """
+    if offline:
+        kwargs["transport"] = _OfflineTransport()
+    if profiler.enabled:
+        kwargs["event_hooks"] = {
+            "request": [_start_request_timer],
+            "response": [_stop_request_timer],
+        }
+    return httpx.Client(base_url=BASE, headers=_get_headers(token), **kwargs)
+
+
+def create_async_client(
+    *,
+    token: str | None = None,
+    offline: bool = False,
+    **kwargs,
+) -> httpx.AsyncClient:
+    """Returns a :py:class:`httpx.AsyncClient` prepared for making GitHub requests.
+
+    If offline is True, every request made by the client raises
+    :py:exc:`OfflineError` instead of touching the network.
+
+    Extra arguments are passed to :py:class:`httpx.AsyncClient`.
+
+    """
+    if offline:
+        kwargs["transport"] = _AsyncOfflineTransport()
+    if profiler.enabled:
+        kwargs["event_hooks"] = {
+            "request": [_async_start_request_timer],
+            "response": [_async_stop_request_timer],
+        }
+    return httpx.AsyncClient(base_url=BASE, headers=_get_headers(token), **kwargs)
+
+
+def _get_headers(token: str | None) -> dict[str, str]:
     headers = HEADERS.copy()
     if token is not None:
         headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+# Response hooks run once the headers are received, so the time spent
+# reading each body is recorded separately by its consumer
+def _start_request_timer(request: httpx.Request) -> None:
+    # Extensions are typed as a read-only mapping, so replace them instead
+    request.extensions = {**request.extensions, "grd_started_at": time.perf_counter()}
+
+
+def _stop_request_timer(response: httpx.Response) -> None:
+    started_at = response.request.extensions.get("grd_started_at")
+    if started_at is not None:
+        profiler.add("http", time.perf_counter() - started_at)
+
+
+async def _async_start_request_timer(request: httpx.Request) -> None:
+    _start_request_timer(request)
+
 
-    return httpx.Client(base_url=BASE, headers=headers)
+async def _async_stop_request_timer(response: httpx.Response) -> None:
+    _stop_request_timer(response)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import datetime
+
 from pydantic import BaseModel
 
 
@@ -12,6 +14,9 @@ class Release(BaseModel):
     assets: list[ReleaseAsset]
     id: int
     name: str
+    tag_name: str
+    prerelease: bool = False
+    published_at: datetime.datetime | None = None
 
 
 class ReleaseAsset(BaseModel):
@@ -22,6 +27,9 @@ class ReleaseAsset(BaseModel):
 
     id: int
     name: str
+    size: int
+    updated_at: datetime.datetime | None = None
+    digest: str | None = None
 
 
 Release.model_rebuild()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Mapping
+from urllib.parse import parse_qs, urlsplit
+
+_LINK_PATTERN = re.compile(r'<([^>]*)>\s*;\s*rel="([^"]*)"')
+
+
+@dataclass(frozen=True)
+class Page:
+    """A page of results from a paginated endpoint.
+
+    :param content: The body of the response.
+    :param links:
+        The URLs of the related pages listed in the ``Link`` header,
+        keyed by their relation (e.g. ``"next"`` or ``"last"``).
+        This is None if the page came from the cache, in which case
+        the other pages are unknown.
+
+    """
+
+    content: bytes
+    links: dict[str, str] | None = None
+
+
+def parse_link_header(headers: Mapping[str, str]) -> dict[str, str]:
+    """Returns the URLs in the ``Link`` header keyed by their relation.
+
+    Reference:
+        https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api
+
+    """
+    value = headers.get("Link", "")
+    return {rel: url for url, rel in _LINK_PATTERN.findall(value)}
+
+
+def get_page_number(url: str) -> int | None:
+    """Returns the value of the ``page`` query parameter in a URL, if any."""
+    values = parse_qs(urlsplit(url).query).get("page")
+    if not values:
+        return None
+
+    try:
+        return int(values[0])
+    except ValueError:
+        return None
@@ -1,10 +1,34 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, ContextManager, Iterator, Protocol
+import logging
+import math
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    ContextManager,
+    Iterator,
+    Mapping,
+    Protocol,
+    Sequence,
+)
 
 if TYPE_CHECKING:
     import httpx
 
+log = logging.getLogger(__name__)
+
+
+class NotModifiedError(Exception):
+    """Raised when opening a conditional stream whose resource
+    has not been modified.
+    """
+
 
 class Stream(Protocol):
     def __len__(self) -> int:
@@ -15,6 +39,20 @@ class Stream(Protocol):
         """Returns an iterator of bytes."""
         ...
 
+    def chunks(self) -> Iterator[tuple[int, bytes]]:
+        """Returns an iterator of (offset, bytes) tuples.
+
+        Unlike :py:meth:`__iter__()`, chunks are not guaranteed to arrive
+        in order and should be written at their given offset.
+
+        """
+        ...
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        """Returns the headers of the response being streamed."""
+        ...
+
     def progress(self) -> int:
         """Returns the number of bytes yielded by the iterator.
 
@@ -23,12 +61,56 @@ class Stream(Protocol):
         """
         ...
 
+    def ranges(self) -> list[tuple[int, int]]:
+        """Returns the (start, end) byte ranges yielded by the stream,
+        where end is exclusive.
+
+        For streams that only yield part of a resource, this can be used
+        to determine how many bytes were previously downloaded.
+
+        """
+        ...
+
 
 class Streamable(ContextManager, Protocol):
     def __enter__(self) -> Stream:
         ...
 
 
+class AsyncStream(Protocol):
+    """The asynchronous equivalent of :py:class:`Stream`."""
+
+    def __len__(self) -> int:
+        """Returns the total size of the stream."""
+        ...
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        """Returns an asynchronous iterator of bytes."""
+        ...
+
+    def chunks(self) -> AsyncIterator[tuple[int, bytes]]:
+        """Returns an asynchronous iterator of (offset, bytes) tuples."""
+        ...
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        """Returns the headers of the response being streamed."""
+        ...
+
+    def progress(self) -> int:
+        """Returns the number of bytes yielded by the iterator."""
+        ...
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """Returns the (start, end) byte ranges yielded by the stream."""
+        ...
+
+
+class AsyncStreamable(AsyncContextManager, Protocol):
+    async def __aenter__(self) -> AsyncStream:
+        ...
+
+
 class ResponseStream(Stream):
     def __init__(self, response: httpx.Response) -> None:
         self.response = response
@@ -39,9 +121,22 @@ class ResponseStream(Stream):
     def __iter__(self) -> Iterator[bytes]:
         return self.response.iter_bytes()
 
+    def chunks(self) -> Iterator[tuple[int, bytes]]:
+        offset = 0
+        for data in self:
+            yield offset, data
+            offset += len(data)
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self.response.headers
+
     def progress(self) -> int:
         return self.response.num_bytes_downloaded
 
+    def ranges(self) -> list[tuple[int, int]]:
+        return [(0, len(self))]
+
 
 class ResponseStreamable(Streamable):
     def __init__(
@@ -56,10 +151,380 @@ class ResponseStreamable(Streamable):
     def __enter__(self) -> ResponseStream:
         response = self.request.__enter__()
 
-        if self.raise_for_status:
+        if response.status_code == 304:
+            self.request.__exit__(None, None, None)
+            raise NotModifiedError(str(response.url))
+        elif self.raise_for_status:
             response.raise_for_status()
 
         return ResponseStream(response)
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> bool | None:
         return self.request.__exit__(exc_type, exc_val, exc_tb)
+
+
+class AsyncResponseStream(AsyncStream):
+    def __init__(self, response: httpx.Response) -> None:
+        self.response = response
+
+    def __len__(self) -> int:
+        return int(self.response.headers["Content-Length"])
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.response.aiter_bytes()
+
+    async def chunks(self) -> AsyncIterator[tuple[int, bytes]]:
+        offset = 0
+        async for data in self:
+            yield offset, data
+            offset += len(data)
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self.response.headers
+
+    def progress(self) -> int:
+        return self.response.num_bytes_downloaded
+
+    def ranges(self) -> list[tuple[int, int]]:
+        return [(0, len(self))]
+
+
+class AsyncResponseStreamable(AsyncStreamable):
+    def __init__(
+        self,
+        request: AsyncContextManager[httpx.Response],
+        *,
+        raise_for_status: bool = True,
+    ) -> None:
+        self.request = request
+        self.raise_for_status = raise_for_status
+
+    async def __aenter__(self) -> AsyncResponseStream:
+        response = await self.request.__aenter__()
+
+        if self.raise_for_status:
+            response.raise_for_status()
+
+        return AsyncResponseStream(response)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool | None:
+        return await self.request.__aexit__(exc_type, exc_val, exc_tb)
+
+
+_content_range_regex = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+def parse_content_range(s: str | None) -> tuple[int, int, int] | None:
+    """Parses a Content-Range header into a tuple of (start, end, size),
+    where end is exclusive.
+
+    If the header is missing or the total size is unknown, None is returned.
+
+    """
+    if s is None:
+        return None
+
+    m = _content_range_regex.fullmatch(s.strip())
+    if m is None:
+        return None
+
+    start, end, size = (int(n) for n in m.groups())
+    return start, end + 1, size
+
+
+class RangedStream(Stream):
+    """Streams a resource by splitting it into byte ranges and fetching
+    them concurrently over multiple connections.
+
+    Chunks from :py:meth:`chunks()` are yielded as soon as any connection
+    receives them, so they are generally not in order. Iterating over the
+    stream directly is not supported.
+
+    :param client: The client to make range requests with.
+    :param first:
+        An already-opened partial response for the first range of the
+        resource. Its URL is re-used for the remaining ranges.
+    :param connections: The maximum number of concurrent connections.
+    :param part_size: The minimum size of each range.
+    :param ranges:
+        The (start, end) byte ranges of the resource to fetch, where
+        the first response begins at the start of the first range.
+        If None, the entire resource is fetched.
+
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        first: httpx.Response,
+        *,
+        connections: int,
+        part_size: int,
+        ranges: Sequence[tuple[int, int]] | None = None,
+    ) -> None:
+        content_range = parse_content_range(first.headers.get("Content-Range"))
+        assert content_range is not None
+        start, end, size = content_range
+
+        if ranges is None:
+            ranges = [(start, size)]
+
+        self.client = client
+        self.first = first
+        self.first_range = (start, end)
+        self.connections = connections
+        self.size = size
+        self.parts = self._split_ranges(
+            _subtract_range(ranges, start, end),
+            connections,
+            part_size,
+        )
+
+        self._received = 0
+        self._closed = threading.Event()
+        self._queue: queue.Queue[tuple[int, bytes] | BaseException | None]
+        self._queue = queue.Queue(maxsize=connections * 4)
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[bytes]:
+        raise TypeError("RangedStream must be consumed with chunks()")
+
+    def chunks(self) -> Iterator[tuple[int, bytes]]:
+        if self._executor is not None:
+            raise RuntimeError("RangedStream can only be consumed once")
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.connections,
+            thread_name_prefix="grd-range",
+        )
+        self._executor.submit(self._consume, self.first, self.first_range[0])
+        for start, end in self.parts:
+            self._executor.submit(self._fetch_range, start, end)
+
+        remaining = len(self.parts) + 1
+        while remaining > 0:
+            item = self._queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            elif isinstance(item, BaseException):
+                raise item
+
+            offset, data = item
+            self._received += len(data)
+            yield offset, data
+
+    def close(self) -> None:
+        """Stops any running connections and closes the first response."""
+        self._closed.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self.first.close()
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self.first.headers
+
+    def progress(self) -> int:
+        return self._received
+
+    def ranges(self) -> list[tuple[int, int]]:
+        return [self.first_range, *self.parts]
+
+    def _fetch_range(self, start: int, end: int) -> None:
+        import httpx
+
+        if self._closed.is_set():
+            return
+
+        try:
+            # Re-use the headers from the (possibly redirected) first request,
+            # since building a request from our client would re-apply any
+            # credentials that shouldn't be sent to another host
+            headers = self.first.request.headers.copy()
+            headers["Range"] = f"bytes={start}-{end - 1}"
+            request = httpx.Request(
+                self.first.request.method,
+                self.first.url,
+                headers=headers,
+            )
+            response = self.client.send(request, stream=True)
+        except BaseException as e:
+            return self._put(e)
+
+        try:
+            response.raise_for_status()
+
+            content_range = parse_content_range(response.headers.get("Content-Range"))
+            if content_range is None or content_range[0] != start:
+                raise ValueError(
+                    f"Expected a partial response for bytes {start}-{end - 1}, "
+                    f"got status {response.status_code}"
+                )
+
+            self._consume(response, start)
+        except BaseException as e:
+            self._put(e)
+        finally:
+            response.close()
+
+    def _consume(self, response: httpx.Response, offset: int) -> None:
+        try:
+            response.raise_for_status()
+            for data in response.iter_bytes():
+                if self._closed.is_set():
+                    return
+                self._put((offset, data))
+                offset += len(data)
+        except BaseException as e:
+            self._put(e)
+        else:
+            self._put(None)
+
+    def _put(self, item: tuple[int, bytes] | BaseException | None) -> None:
+        # Wait for the consumer, but give up if the stream has been closed
+        while not self._closed.is_set():
+            try:
+                return self._queue.put(item, timeout=0.1)
+            except queue.Full:
+                pass
+
+    @staticmethod
+    def _split_ranges(
+        ranges: Sequence[tuple[int, int]],
+        connections: int,
+        part_size: int,
+    ) -> list[tuple[int, int]]:
+        remaining = sum(end - start for start, end in ranges)
+        if remaining <= 0:
+            return []
+
+        part_size = max(part_size, math.ceil(remaining / connections))
+        return [
+            (offset, min(offset + part_size, end))
+            for start, end in ranges
+            for offset in range(start, end, part_size)
+        ]
+
+
+def _subtract_range(
+    ranges: Sequence[tuple[int, int]],
+    start: int,
+    end: int,
+) -> list[tuple[int, int]]:
+    """Removes the given range from a sequence of ranges."""
+    result = []
+    for a, b in ranges:
+        if a < start:
+            result.append((a, min(b, start)))
+        if b > end:
+            result.append((max(a, end), b))
+    return result
+
+
+class RangedStreamable(Streamable):
+    """Opens a :py:class:`RangedStream` for the given request,
+    falling back to a :py:class:`ResponseStream` if the server
+    does not support range requests.
+
+    :param ranges:
+        The (start, end) byte ranges of the resource to fetch.
+        If None, the entire resource is fetched.
+    :param if_range:
+        An ETag to send in the If-Range header. If the resource no longer
+        matches it, the server responds with the entire resource which
+        is streamed instead of the requested ranges.
+
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        method: str,
+        url: str,
+        *,
+        connections: int,
+        headers: Mapping[str, Any] = {},
+        part_size: int = 8 * 1024 * 1024,
+        follow_redirects: bool = True,
+        ranges: Sequence[tuple[int, int]] | None = None,
+        if_range: str | None = None,
+    ) -> None:
+        self.client = client
+        self.method = method
+        self.url = url
+        self.connections = connections
+        self.headers = headers
+        self.part_size = part_size
+        self.follow_redirects = follow_redirects
+        self.ranges = ranges
+        self.if_range = if_range
+
+        self._response: httpx.Response | None = None
+        self._stream: RangedStream | None = None
+
+    def __enter__(self) -> Stream:
+        start, end = 0, self.part_size
+        if self.ranges:
+            start, end = self.ranges[0]
+            end = min(end, start + self.part_size)
+
+        headers = dict(self.headers)
+        headers["Range"] = f"bytes={start}-{end - 1}"
+        if self.if_range is not None:
+            headers["If-Range"] = self.if_range
+
+        response = self._send(headers)
+        content_range = parse_content_range(response.headers.get("Content-Range"))
+
+        if response.status_code == 416 or (
+            response.status_code == 206 and content_range is None
+        ):
+            # Either the resource is empty and cannot satisfy any range,
+            # or the server doesn't know the size to split ranges with
+            log.debug("cannot split resource into ranges, retrying without range")
+            response.close()
+            response = self._send(self.headers)
+            content_range = None
+
+        if response.status_code == 304:
+            response.close()
+            raise NotModifiedError(str(response.url))
+
+        self._response = response
+        try:
+            response.raise_for_status()
+        except BaseException:
+            response.close()
+            raise
+
+        if response.status_code != 206 or content_range is None:
+            log.debug("server does not support range requests")
+            return ResponseStream(response)
+
+        self._stream = RangedStream(
+            self.client,
+            response,
+            connections=self.connections,
+            part_size=self.part_size,
+            ranges=self.ranges,
+        )
+        return self._stream
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool | None:
+        if self._stream is not None:
+            self._stream.close()
+        if self._response is not None:
+            self._response.close()
+
+    def _send(self, headers: Mapping[str, Any]) -> httpx.Response:
+        request = self.client.build_request(self.method, self.url, headers=headers)
+        return self.client.send(
+            request,
+            stream=True,
+            follow_redirects=self.follow_redirects,
+        )
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .retry import parse_retry_after
+
+if TYPE_CHECKING:
+    import httpx
+
+    from ..database.ratelimits import RateLimitStore
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RESOURCE = "core"
+"""The resource assumed for requests before GitHub has reported one."""
+
+MAX_RATE_LIMIT_RETRIES = 3
+"""The number of times a rate-limited request is retried before failing."""
+
+PACING_FRACTION = 0.2
+"""The fraction of the limit below which requests are spread out
+evenly until the rate limit resets."""
+
+RESERVE_FRACTION = 0.05
+"""The fraction of the limit kept for conditional requests."""
+
+SYNC_INTERVAL = 1.0
+"""The minimum number of seconds between reading and writing the
+shared rate limits."""
+
+
+def get_rate_limit_key(token: str | None) -> str:
+    """Returns the key identifying a token's rate limit without revealing it."""
+    if token is None:
+        return "anonymous"
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclass
+class RateLimitState:
+    """The rate limit of one resource as last seen by a :py:class:`RateLimiter`."""
+
+    limit: int
+    remaining: int
+    reset_at: datetime.datetime
+
+    @property
+    def reserve(self) -> int:
+        """The number of requests kept for conditional requests."""
+        return int(self.limit * RESERVE_FRACTION)
+
+
+class RateLimiter:
+    """Schedules requests so that they stay within GitHub's rate limits.
+
+    The rate limit headers of every response are recorded. Once a limit
+    runs low, requests are paced to spread the remaining budget until it
+    resets, and once it runs out, requests wait until the reset instead
+    of failing. The last few requests of each window are kept for
+    conditional requests, since those answered with 304 Not Modified
+    do not count against the limit.
+
+    :param key:
+        The key identifying the token that requests are made with,
+        as returned by :py:func:`get_rate_limit_key()`.
+    :param store:
+        The store to share rate limits with other processes using
+        the same token. If None, rate limits are only tracked in memory.
+
+    """
+
+    def __init__(self, key: str, store: RateLimitStore | None = None) -> None:
+        self.key = key
+        self.store = store
+        self._states: dict[str, RateLimitState] = {}
+        self._dirty: set[str] = set()
+        self._next_request_at = 0.0
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def acquire(self, *, conditional: bool, resource: str = DEFAULT_RESOURCE) -> None:
+        """Waits until a request can be made.
+
+        :param conditional:
+            Whether the request is conditional, allowing it to use
+            the requests kept in reserve.
+        :param resource: The rate limit resource the request counts against.
+
+        """
+        delay = self._reserve(conditional, resource)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_acquire(
+        self,
+        *,
+        conditional: bool,
+        resource: str = DEFAULT_RESOURCE,
+    ) -> None:
+        """The asynchronous equivalent of :py:meth:`acquire()`."""
+        delay = await asyncio.to_thread(self._reserve, conditional, resource)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def flush(self) -> None:
+        """Saves any rate limits that have not been shared yet."""
+        with self._lock:
+            self._save()
+
+    def update(self, response: httpx.Response) -> float | None:
+        """Records the rate limit reported by a response.
+
+        :returns:
+            The number of seconds to wait before retrying the request
+            if it was rejected by a rate limit, or None otherwise.
+
+        """
+        state = _parse_rate_limit(response)
+        resource = response.headers.get("X-RateLimit-Resource", DEFAULT_RESOURCE)
+
+        retry_after = None
+        if response.status_code in (403, 429):
+            retry_after = parse_retry_after(response.headers)
+            if retry_after is None and state is not None and state.remaining == 0:
+                retry_after = (state.reset_at - _now()).total_seconds()
+
+        with self._lock:
+            if state is not None:
+                self._merge(resource, state, reported=True)
+                self._dirty.add(resource)
+                if self._is_sync_due() or state.remaining <= state.reserve:
+                    self._sync()
+
+        if retry_after is None:
+            return None
+        return max(retry_after, 1.0)
+
+    def _is_sync_due(self) -> bool:
+        return (
+            self._synced_at is None
+            or time.monotonic() - self._synced_at >= SYNC_INTERVAL
+        )
+
+    def _merge(self, resource: str, state: RateLimitState, *, reported: bool) -> None:
+        current = self._states.get(resource)
+        if current is None or state.reset_at > current.reset_at:
+            self._states[resource] = state
+        elif state.reset_at != current.reset_at:
+            return
+        elif reported:
+            # The server's count replaces any requests assumed to count locally
+            current.remaining = state.remaining
+        else:
+            # Other processes may have made requests since our last response
+            current.remaining = min(current.remaining, state.remaining)
+
+    def _reserve(self, conditional: bool, resource: str) -> float:
+        # Reserves a request, returning the number of seconds to wait for it
+        with self._lock:
+            if self.store is not None and self._is_sync_due():
+                self._sync()
+
+            state = self._states.get(resource)
+            if state is None:
+                return 0.0
+
+            until_reset = (state.reset_at - _now()).total_seconds()
+            if until_reset <= 0:
+                # The limit has reset, so wait for a response to see the new one
+                del self._states[resource]
+                return 0.0
+
+            reserve = 0 if conditional else state.reserve
+            if state.remaining <= reserve:
+                log.warning(
+                    "rate limit for %s requests exhausted, waiting %.0f seconds",
+                    resource,
+                    until_reset,
+                )
+                # Leave some leeway for clock differences with GitHub
+                return until_reset + 1
+
+            if conditional:
+                # Requests answered with 304 Not Modified are free,
+                # so only their response can say whether they counted
+                return 0.0
+
+            # Assume the request counts until its response says otherwise
+            state.remaining -= 1
+            if state.remaining >= state.limit * PACING_FRACTION:
+                return 0.0
+
+            interval = until_reset / (state.remaining - reserve + 1)
+            now = time.monotonic()
+            request_at = max(now, self._next_request_at)
+            self._next_request_at = request_at + interval
+            return request_at - now
+
+    def _save(self) -> None:
+        if self.store is None or not self._dirty:
+            return
+
+        from ..database.models import RateLimit
+
+        self.store.save(
+            [
+                RateLimit(
+                    key=self.key,
+                    resource=resource,
+                    limit=self._states[resource].limit,
+                    remaining=self._states[resource].remaining,
+                    reset_at=self._states[resource].reset_at,
+                )
+                for resource in self._dirty
+                if resource in self._states
+            ]
+        )
+        self._dirty.clear()
+
+    def _sync(self) -> None:
+        self._synced_at = time.monotonic()
+        if self.store is None:
+            return
+
+        self._save()
+        for rate_limit in self.store.get(self.key):
+            self._merge(
+                rate_limit.resource,
+                RateLimitState(
+                    limit=rate_limit.limit,
+                    remaining=rate_limit.remaining,
+                    reset_at=rate_limit.reset_at,
+                ),
+                reported=False,
+            )
+
+
+def _parse_rate_limit(response: httpx.Response) -> RateLimitState | None:
+    headers = response.headers
+    try:
+        return RateLimitState(
+            limit=int(headers["X-RateLimit-Limit"]),
+            remaining=int(headers["X-RateLimit-Remaining"]),
+            reset_at=datetime.datetime.fromtimestamp(
+                int(headers["X-RateLimit-Reset"]),
+                datetime.timezone.utc,
+            ),
+        )
+    except (KeyError, ValueError):
+        return None
@@ -1,12 +1,34 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import collections
+import contextvars
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Generator, Iterable, Sequence
 
+from pydantic import TypeAdapter
+
+from .graphql import GRAPHQL_BATCH_SIZE, build_latest_releases_query, to_rest_release
 from .models import Release
-from .protocols import ResponseStreamable, Streamable
+from .pagination import Page, get_page_number
+from .protocols import (
+    AsyncResponseStreamable,
+    AsyncStreamable,
+    RangedStreamable,
+    ResponseStreamable,
+    Streamable,
+)
 
 if TYPE_CHECKING:
-    from .base import BaseClient
+    from .base import AsyncBaseClient, BaseClient
+
+log = logging.getLogger(__name__)
+
+RELEASES_PER_PAGE = 100
+"""The number of releases requested per page, which is the most GitHub allows."""
+
+_ReleaseList = TypeAdapter(list[Release])
 
 
 class ReleaseClient:
@@ -17,28 +39,288 @@ class ReleaseClient:
 
     def get_release_by_tag(self, owner: str, repo: str, tag: str) -> Release:
         """Gets a specific release from the repository by tag."""
-        response = self.base.cached_request(
+        content = self.base.cached_request_content(
             "GET",
             f"/repos/{owner}/{repo}/releases/tags/{tag}",
             headers=self.base.JSON_HEADERS,
         )
-        return Release(**response)
+        return Release.model_validate_json(content)
 
     def get_latest_release(self, owner: str, repo: str) -> Release:
         """Gets the repository's latest release."""
-        response = self.base.cached_request(
+        content = self.base.cached_request_content(
             "GET",
             f"/repos/{owner}/{repo}/releases/latest",
             headers=self.base.JSON_HEADERS,
         )
-        return Release(**response)
+        return Release.model_validate_json(content)
+
+    def get_latest_releases(
+        self,
+        repos: Iterable[tuple[str, str]],
+        *,
+        batch_size: int = GRAPHQL_BATCH_SIZE,
+    ) -> dict[tuple[str, str], Release]:
+        """Gets the latest release of many repositories at once.
+
+        Releases that can be used from the cache are returned as is.
+        The rest are looked up with GraphQL queries for up to
+        ``batch_size`` repositories each, and cached as if they were
+        returned by :py:meth:`get_latest_release()`.
+
+        GraphQL requires authentication, so no queries are made without
+        a token or while offline. Repositories that could not be resolved
+        this way, like those without releases or with too many assets,
+        are left out, and should be looked up with
+        :py:meth:`get_latest_release()` instead.
+
+        :param repos: An iterable of (owner, repo) tuples.
+        :param batch_size: The number of repositories to look up per query.
+        :returns: The latest release of each repository that was resolved.
+
+        """
+        urls = {
+            (owner, repo): f"/repos/{owner}/{repo}/releases/latest"
+            for owner, repo in repos
+        }
+        cached = self.base.get_cached_contents(
+            "GET",
+            urls.values(),
+            headers=self.base.JSON_HEADERS,
+        )
+
+        releases = {}
+        pending = []
+        for key, url in urls.items():
+            content = cached.get(url)
+            if content is not None:
+                releases[key] = Release.model_validate_json(content)
+            else:
+                pending.append(key)
+
+        if not pending:
+            return releases
+        elif self.base.offline or "Authorization" not in self.base.client.headers:
+            log.debug("GraphQL is unavailable, leaving %d releases", len(pending))
+            return releases
+
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i : i + batch_size]
+            variables = {}
+            for j, (owner, repo) in enumerate(batch):
+                variables[f"owner{j}"] = owner
+                variables[f"name{j}"] = repo
+
+            query = build_latest_releases_query(len(batch))
+            try:
+                data = self.base.graphql(query, variables)
+            except Exception as e:
+                log.warning(
+                    "could not resolve %d releases with GraphQL: %s", len(batch), e
+                )
+                continue
+
+            for j, key in enumerate(batch):
+                node = (data.get(f"r{j}") or {}).get("latestRelease")
+                release = to_rest_release(node) if node is not None else None
+                if release is None:
+                    continue
+
+                content = json.dumps(release).encode()
+                self.base.set_cached_content("GET", urls[key], content)
+                releases[key] = Release.model_validate(release)
+
+        log.debug("resolved %d of %d releases", len(releases), len(urls))
+        return releases
+
+    def list_releases(
+        self,
+        owner: str,
+        repo: str,
+        *,
+        workers: int = 1,
+        per_page: int = RELEASES_PER_PAGE,
+    ) -> Generator[Release, None, None]:
+        """Yields every release in the repository, newest first.
+
+        Each page of releases is cached like any other response, so listing
+        a repository again mostly makes conditional requests. Releases are
+        yielded as soon as their page arrives instead of after every page.
+
+        Once the first page reveals the number of pages, the remaining
+        pages are requested concurrently. If it came from the cache,
+        up to the given number of pages are requested ahead until
+        one of them is not full.
+
+        :param workers: The number of pages to request concurrently.
+        :param per_page: The number of releases to request per page.
+
+        """
+
+        def fetch(page: int) -> Page:
+            return self.base.cached_request_page(
+                "GET",
+                f"/repos/{owner}/{repo}/releases?per_page={per_page}&page={page}",
+                headers=self.base.JSON_HEADERS,
+            )
+
+        def get_last_page(page: int, result: Page) -> int | None:
+            if result.links is None:
+                return None
+            elif "next" not in result.links:
+                return page
+            return get_page_number(result.links.get("last", ""))
+
+        first = fetch(1)
+        releases = _ReleaseList.validate_json(first.content)
+        yield from releases
+
+        last_page = get_last_page(1, first)
+        if len(releases) < per_page or last_page == 1:
+            return
+
+        next_page = 2
+        pending: collections.deque[tuple[int, Future[Page]]] = collections.deque()
+        with ThreadPoolExecutor(workers, thread_name_prefix="grd-list") as executor:
+            try:
+                while True:
+                    while len(pending) < workers and (
+                        last_page is None or next_page <= last_page
+                    ):
+                        future = executor.submit(
+                            contextvars.copy_context().run, fetch, next_page
+                        )
+                        pending.append((next_page, future))
+                        next_page += 1
+
+                    if not pending:
+                        return
+
+                    page, future = pending.popleft()
+                    result = future.result()
+                    releases = _ReleaseList.validate_json(result.content)
+                    yield from releases
+
+                    if len(releases) < per_page:
+                        return
+                    elif last_page is None:
+                        last_page = get_last_page(page, result)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def prefetch_releases(
+        self,
+        releases: Iterable[tuple[str, str, str | None]],
+    ) -> None:
+        """Loads the cached responses for many releases at once.
+
+        :param releases:
+            An iterable of (owner, repo, tag) tuples. If the tag is None,
+            the repository's latest release is prefetched.
+
+        """
+        urls = []
+        for owner, repo, tag in releases:
+            if tag is None:
+                urls.append(f"/repos/{owner}/{repo}/releases/latest")
+            else:
+                urls.append(f"/repos/{owner}/{repo}/releases/tags/{tag}")
+        self.base.prefetch("GET", urls)
+
+    def stream_asset(
+        self,
+        owner: str,
+        repo: str,
+        asset_id: int,
+        *,
+        connections: int = 1,
+        ranges: Sequence[tuple[int, int]] | None = None,
+        if_range: str | None = None,
+        if_none_match: str | None = None,
+    ) -> Streamable:
+        """Returns a stream of bytes for the given asset.
+
+        :param connections:
+            The number of concurrent connections to download the asset with.
+            If greater than 1, the asset is split into byte ranges which
+            are yielded out of order by :py:meth:`Stream.chunks()`.
+            Servers that do not support range requests will fall back
+            to a single connection.
+        :param ranges:
+            The (start, end) byte ranges of the asset to download,
+            typically to resume a previous download. If None,
+            the entire asset is downloaded.
+        :param if_range:
+            The ETag of the previously downloaded asset. If the asset has
+            changed since then, the entire asset is streamed instead of
+            the given ranges, which can be checked with
+            :py:meth:`Stream.ranges()`.
+        :param if_none_match:
+            The ETag of the previously downloaded asset. If the asset
+            has not changed since then, :py:class:`NotModifiedError`
+            is raised when entering the stream.
+
+        """
+        url = f"/repos/{owner}/{repo}/releases/assets/{asset_id}"
+        headers = {"Accept": "application/octet-stream"}
+        if if_none_match is not None:
+            headers["If-None-Match"] = if_none_match
+
+        if self.base.rate_limiter is not None:
+            # Only the API request counts, not the redirect to download it
+            self.base.rate_limiter.acquire(conditional=if_none_match is not None)
+
+        if connections > 1 or ranges is not None:
+            return RangedStreamable(
+                self.base.client,
+                "GET",
+                url,
+                connections=connections,
+                headers=headers,
+                ranges=ranges,
+                if_range=if_range,
+            )
 
-    def stream_asset(self, owner: str, repo: str, asset_id: int) -> Streamable:
-        """Returns a stream of bytes for the given asset."""
+        request = self.base.client.stream(
+            "GET",
+            url,
+            follow_redirects=True,
+            headers=headers,
+        )
+        return ResponseStreamable(request)
+
+
+class AsyncReleaseClient:
+    """The asynchronous equivalent of :py:class:`ReleaseClient`."""
+
+    def __init__(self, base: AsyncBaseClient) -> None:
+        self.base = base
+
+    async def get_release_by_tag(self, owner: str, repo: str, tag: str) -> Release:
+        """Gets a specific release from the repository by tag."""
+        content = await self.base.cached_request_content(
+            "GET",
+            f"/repos/{owner}/{repo}/releases/tags/{tag}",
+            headers=self.base.JSON_HEADERS,
+        )
+        return Release.model_validate_json(content)
+
+    async def get_latest_release(self, owner: str, repo: str) -> Release:
+        """Gets the repository's latest release."""
+        content = await self.base.cached_request_content(
+            "GET",
+            f"/repos/{owner}/{repo}/releases/latest",
+            headers=self.base.JSON_HEADERS,
+        )
+        return Release.model_validate_json(content)
+
+    def stream_asset(self, owner: str, repo: str, asset_id: int) -> AsyncStreamable:
+        """Returns an asynchronous stream of bytes for the given asset."""
         request = self.base.client.stream(
             "GET",
             f"/repos/{owner}/{repo}/releases/assets/{asset_id}",
             follow_redirects=True,
             headers={"Accept": "application/octet-stream"},
         )
-        return ResponseStreamable(request)
+        return AsyncResponseStreamable(request)
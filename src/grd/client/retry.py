@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import datetime
+import random
+from dataclasses import dataclass, field
+from typing import Mapping
+
+from .dates import maybe_parse_http_date
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+"""The response statuses that indicate a transient failure."""
+
+
+@dataclass(frozen=True, kw_only=True)
+class RetryPolicy:
+    """Decides which failed requests to retry and how long to wait first.
+
+    Delays grow exponentially with each attempt, and are randomly shortened
+    by up to the jitter fraction so that concurrent requests failing at the
+    same time do not retry at the same time. A ``Retry-After`` header sent
+    by the server is always honored instead.
+
+    :param retries:
+        The maximum number of times a request is retried.
+        If 0, requests are never retried.
+    :param backoff: The delay in seconds before the first retry.
+    :param max_backoff: The maximum delay in seconds before any retry.
+    :param jitter: The fraction by which each delay can be randomly shortened.
+    :param statuses: The response statuses to retry.
+
+    """
+
+    retries: int = 3
+    backoff: float = 1.0
+    max_backoff: float = 30.0
+    jitter: float = 0.5
+    statuses: frozenset[int] = field(default=RETRY_STATUSES)
+
+    def get_delay(self, attempt: int, exc: Exception) -> float:
+        """Returns the number of seconds to wait before retrying
+        after the given attempt failed, starting from 0.
+        """
+        retry_after = _get_retry_after(exc)
+        if retry_after is not None:
+            return retry_after
+
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def should_retry(self, attempt: int, exc: Exception) -> bool:
+        """Checks if a request should be retried after the given attempt
+        failed with an exception, starting from 0.
+        """
+        import httpx
+
+        if attempt >= self.retries:
+            return False
+        elif isinstance(exc, httpx.HTTPStatusError):
+            response = exc.response
+            # Secondary rate limits are reported as 403 with Retry-After
+            return response.status_code in self.statuses or (
+                response.status_code == 403 and "Retry-After" in response.headers
+            )
+        return isinstance(exc, httpx.TransportError)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> float | None:
+    """Returns the number of seconds to wait according to
+    the ``Retry-After`` header, if any.
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = maybe_parse_http_date(value)
+    except ValueError:
+        return None
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max((date - now).total_seconds(), 0.0)
+
+
+def _get_retry_after(exc: Exception) -> float | None:
+    import httpx
+
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    return parse_retry_after(exc.response.headers)
@@ -1,6 +1,39 @@
+import threading
+from contextvars import ContextVar
 from pathlib import Path
 
 # For faster loading, don't import database submodules here
 from ..dirs import dirs
 
 engine_path = Path(f"{dirs.user_data_dir}/data.db")
+store_path = Path(f"{dirs.user_cache_dir}/assets")
+
+writing: ContextVar[bool] = ContextVar("writing", default=False)
+"""Indicates if the current context is holding :py:data:`write_lock`."""
+
+
+class _WriteLock:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> None:
+        self._lock.acquire()
+        # Only one context can hold the lock, so the token can be kept here
+        self._token = writing.set(True)
+
+    def __exit__(self, *args) -> None:
+        writing.reset(self._token)
+        self._lock.release()
+
+
+write_lock = _WriteLock()
+"""Serializes write transactions across threads.
+
+SQLite fails immediately instead of waiting when two transactions
+try to upgrade from reading to writing at the same time, so every
+manager writing to the database must hold this lock.
+
+Transactions started while holding this lock take the database's
+write lock upfront with ``BEGIN IMMEDIATE``, allowing other processes
+to wait on it according to the busy timeout instead of failing.
+"""
@@ -1,12 +1,20 @@
 import contextlib
 import datetime
 import logging
+import threading
+import time
+from collections import OrderedDict
 from contextvars import ContextVar
-from typing import Any, Callable, Generator, TypeVar
+from dataclasses import dataclass
+from typing import Any, Callable, Generator, Iterable, Sequence, TypeVar
 
-from sqlalchemy import delete
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session, sessionmaker
 
+from . import write_lock
+from .compression import Encoding, compress, get_default_encoding, is_supported
+from .memory import Freshness, get_freshness
 from .models import Response
 
 T = TypeVar("T")
@@ -14,9 +22,101 @@ T = TypeVar("T")
 _bucket: ContextVar[set[str]] = ContextVar("_current_bucket")
 """Contains a set of keys that have been accessed by the cache in the current context."""
 
+MAX_BATCH_SIZE = 500
+"""The maximum number of keys to send in a single statement,
+staying well under SQLite's limit on bound parameters.
+"""
+
+EVICTION_BATCH_SIZE = 1000
+"""The maximum number of expired responses to delete at once
+in :py:meth:`ResponseCache.evict_expired()`.
+"""
+
+_UNKNOWN: Any = object()
+
 log = logging.getLogger(__name__)
 
 
+@dataclass
+class CacheStats:
+    """Counts the lookups served by each tier of a :py:class:`ResponseCache`."""
+
+    memory_hits: int = 0
+    database_hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class CacheSummary:
+    """Summarizes the responses stored by a :py:class:`ResponseCache`."""
+
+    entries: int
+    size: int
+    expired: int
+    oldest: datetime.datetime | None
+    newest: datetime.datetime | None
+
+
+def _batched(items: Sequence[T], n: int) -> Generator[Sequence[T], None, None]:
+    for i in range(0, len(items), n):
+        yield items[i : i + n]
+
+
+class _MemoryCache:
+    """A thread-safe LRU mapping of keys to responses, where each entry
+    is discarded after a fixed amount of time.
+
+    Keys known to be missing from the database are stored as None.
+
+    """
+
+    def __init__(self, max_size: int, ttl: float | None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Response | None]]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self, before: datetime.datetime | None = None) -> None:
+        with self._lock:
+            if before is None:
+                self._entries.clear()
+                return
+
+            for key, (_, response) in list(self._entries.items()):
+                if response is not None and response.created_at < before:
+                    del self._entries[key]
+
+    def discard(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def get(self, key: str, default: Any = None) -> Response | None | Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            stored_at, response = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: Response | None) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
 class ResponseCache:
     """Manages caching of responses.
 
@@ -28,6 +128,38 @@ class ResponseCache:
         A function that is called when an exception occurs
         inside the :py:meth:`bucket()` context manager.
         If it returns True, the bucket will not invalidate the cache.
+    :param memory_size:
+        The maximum number of responses to keep in memory in front
+        of the database. If 0, every lookup goes to the database.
+    :param max_age:
+        The amount of time after a response was last validated during
+        which it can be used without revalidating it. If None, responses
+        must always be revalidated.
+    :param stale_while_revalidate:
+        The amount of time after max-age during which a response can
+        still be used while it is revalidated afterwards.
+    :param encoding:
+        The compression to store response bodies with. If None,
+        zstd is used when available, otherwise zlib.
+    :param memory_ttl:
+        The amount of time a response is kept in memory before being
+        looked up from the database again, which allows changes made
+        by other processes to be seen. If None, responses are kept
+        in memory until they are evicted.
+    :param max_size:
+        The maximum total size of stored response bodies in bytes.
+        If None, the size is unlimited.
+    :param max_entries:
+        The maximum number of stored responses.
+        If None, the number of responses is unlimited.
+
+    Responses are written through to the database. The number of
+    lookups served by each tier is counted in :py:attr:`stats`.
+    When the size limits are exceeded, the least recently used responses
+    are evicted by :py:meth:`flush()`.
+
+    This class is thread-safe. Writes are serialized to avoid deadlocks
+    between SQLite transactions upgrading to a write lock.
 
     """
 
@@ -37,10 +169,34 @@ class ResponseCache:
         *,
         bucket_predicate: Callable[[Exception], bool] | None = None,
         expires_after: datetime.timedelta | None = None,
+        memory_size: int = 256,
+        memory_ttl: datetime.timedelta | None = datetime.timedelta(minutes=5),
+        encoding: Encoding | None = None,
+        max_age: datetime.timedelta | None = None,
+        stale_while_revalidate: datetime.timedelta | None = None,
+        max_size: int | None = None,
+        max_entries: int | None = None,
     ) -> None:
         self.sessionmaker = sessionmaker
         self.expires_after = expires_after
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
         self.bucket_predicate = bucket_predicate
+        self.encoding: Encoding = encoding or get_default_encoding()
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._write_lock = write_lock
+        self._pending: dict[str, Response] = {}
+        self._pending_lock = threading.Lock()
+        self._accessed: set[str] = set()
+        self._lookups: dict[str, bool] = {}
+        self._deferring = 0
+        self._memory = _MemoryCache(
+            memory_size,
+            memory_ttl.total_seconds() if memory_ttl is not None else None,
+        )
 
     @contextlib.contextmanager
     def bucket(self) -> Generator[set[str], None, None]:
@@ -86,59 +242,419 @@ class ResponseCache:
         elif expired:
             query = query.where(Response.created_at < expires_at)
 
-        with self.sessionmaker.begin() as session:
+        self._memory.clear(expires_at if expired else None)
+        with self._write_lock, self.sessionmaker.begin() as session:
             session.execute(query)
 
+    def evict(
+        self,
+        max_size: int | None = None,
+        max_entries: int | None = None,
+    ) -> int:
+        """Evicts the least recently used responses until the cache
+        is within the given limits.
+
+        :param max_size:
+            The maximum total size of the cache in bytes.
+            If None, :py:attr:`max_size` is used.
+        :param max_entries:
+            The maximum number of responses in the cache.
+            If None, :py:attr:`max_entries` is used.
+        :returns: The number of responses that were deleted.
+
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_entries is None:
+            max_entries = self.max_entries
+        if max_size is None and max_entries is None:
+            return 0
+
+        def within_limits() -> bool:
+            return (max_size is None or total <= max_size) and (
+                max_entries is None or count <= max_entries
+            )
+
+        keys: list[str] = []
+        with self._write_lock, self.sessionmaker.begin() as session:
+            query = select(func.count(), func.sum(Response.size))
+            count, total = session.execute(query).one()
+            total = total or 0
+            if within_limits():
+                return 0
+
+            query = select(Response.key, Response.size).order_by(Response.accessed_at)
+            for key, size in session.execute(query):
+                if within_limits():
+                    break
+                keys.append(key)
+                count -= 1
+                total -= size
+
+            log.debug("evicting %d least recently used cache entries", len(keys))
+            for batch in _batched(keys, MAX_BATCH_SIZE):
+                session.execute(delete(Response).where(Response.key.in_(batch)))
+
+        self._memory.discard(*keys)
+        return len(keys)
+
+    def evict_expired(self, limit: int | None = EVICTION_BATCH_SIZE) -> int:
+        """Deletes up to the given number of expired responses,
+        starting with the oldest.
+
+        Expired responses are found with a read-only query first,
+        so no write transaction is started when nothing has expired.
+        This keeps the cost of eviction bounded regardless of the size
+        of the cache, with any remaining responses being evicted
+        on a later call.
+
+        :param limit:
+            The maximum number of responses to delete.
+            If None, every expired response is deleted.
+        :returns: The number of responses that were deleted.
+
+        """
+        expires_at = self._get_expiry_date()
+        if expires_at is None:
+            return 0
+
+        query = (
+            select(Response.key)
+            .where(Response.created_at < expires_at)
+            .order_by(Response.created_at)
+            .limit(limit)
+        )
+        with self.sessionmaker.begin() as session:
+            keys = list(session.scalars(query))
+
+        if not keys:
+            return 0
+
+        log.debug("evicting %d expired cache entries", len(keys))
+        self._memory.discard(*keys)
+
+        # Responses may have been refreshed by another process since
+        # they were selected, so their expiry is checked again
+        with self._write_lock, self.sessionmaker.begin() as session:
+            for batch in _batched(keys, MAX_BATCH_SIZE):
+                session.execute(
+                    delete(Response).where(
+                        Response.key.in_(batch),
+                        Response.created_at < expires_at,
+                    )
+                )
+
+        return len(keys)
+
+    @contextlib.contextmanager
+    def deferred(self) -> Generator[None, None, None]:
+        """Returns a context manager that defers writes from :py:meth:`set()`
+        until it exits, at which point they are committed to the database
+        in a single transaction.
+
+        Deferred responses are immediately visible to :py:meth:`get()`.
+        This context manager can be nested and used across threads.
+
+        """
+        with self._pending_lock:
+            self._deferring += 1
+
+        try:
+            yield
+        finally:
+            with self._pending_lock:
+                self._deferring -= 1
+                pending = []
+                if self._deferring == 0:
+                    pending = list(self._pending.values())
+                    self._pending.clear()
+
+            self._write(pending)
+
     def discard(self, *keys: str) -> None:
         """Discards a set of keys from the cache."""
+        self.discard_many(keys)
+
+    def discard_many(self, keys: Iterable[str]) -> None:
+        """Discards many keys from the cache in a single transaction."""
+        keys = list(keys)
         log.debug("discarding %d cache key(s)", len(keys))
 
-        query = delete(Response).where(Response.key.in_(keys))
-        with self.sessionmaker.begin() as session:
-            session.execute(query)
+        self._memory.discard(*keys)
+        with self._pending_lock:
+            for key in keys:
+                self._pending.pop(key, None)
+
+        with self._write_lock, self.sessionmaker.begin() as session:
+            for batch in _batched(keys, MAX_BATCH_SIZE):
+                session.execute(delete(Response).where(Response.key.in_(batch)))
+
+    def flush(self) -> None:
+        """Records when responses were last accessed and evicts the least
+        recently used responses if the cache exceeds its size limits.
+
+        Access times are kept in memory until this method is called,
+        so that lookups never have to start a write transaction.
+
+        """
+        with self._pending_lock:
+            accessed = list(self._accessed)
+            self._accessed.clear()
+
+        if accessed:
+            log.debug("recording access of %d cache key(s)", len(accessed))
+            now = datetime.datetime.now().astimezone()
+            with self._write_lock, self.sessionmaker.begin() as session:
+                for batch in _batched(accessed, MAX_BATCH_SIZE):
+                    session.execute(
+                        update(Response)
+                        .where(Response.key.in_(batch))
+                        .values(accessed_at=now)
+                    )
+
+        self.evict()
+
+    def freshness(self, response: Response) -> Freshness:
+        """Determines if a response can be used without revalidating it."""
+        return get_freshness(
+            response.validated_at or response.created_at,
+            self.max_age,
+            self.stale_while_revalidate,
+        )
 
     def get(self, key: str) -> Response | None:
         """Looks for a response in the cache."""
-        expires_at = self._get_expiry_date()
+        return self.get_many([key]).get(key)
 
-        with self.sessionmaker.begin() as session:
-            # Don't expire the response object when we return it
-            session.expire_on_commit = False
+    def get_many(self, keys: Iterable[str]) -> dict[str, Response]:
+        """Looks for many responses in the cache.
+
+        Keys that are not in memory are looked up from the database
+        with as few queries as possible.
+
+        :returns: A dictionary of every key that was found in the cache.
 
-            response = session.get(Response, key)
+        """
+        expires_at = self._get_expiry_date()
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, Response] = {}
+        remaining: list[str] = []
+
+        for key in keys:
+            with self._pending_lock:
+                response = self._pending.get(key)
             if response is None:
-                log.debug("cache miss: %s", key)
-                return None
+                response = self._memory.get(key, _UNKNOWN)
+
+            if response is _UNKNOWN:
+                remaining.append(key)
+            elif response is None:
+                log.debug("cache miss (memory): %s", key)
+                self._count("misses")
             elif expires_at is not None and response.created_at < expires_at:
                 log.debug("cache key expired: %s", key)
-                return None
+                self._memory.discard(key)
+                self._count("misses")
+            else:
+                log.debug("cache hit (memory): %s", key)
+                self._count("memory_hits")
+                found[key] = response
 
+        if remaining:
+            with self.sessionmaker.begin() as session:
+                # Don't expire the response objects when we return them
+                session.expire_on_commit = False
+
+                stored: dict[str, Response] = {}
+                for batch in _batched(remaining, MAX_BATCH_SIZE):
+                    query = select(Response).where(Response.key.in_(batch))
+                    stored.update((r.key, r) for r in session.scalars(query))
+
+            unreadable = []
+            for key in remaining:
+                response = stored.get(key)
+                if response is not None and not is_supported(response.encoding):
+                    # e.g. stored with zstd by an installation that had it
+                    log.debug(
+                        "cache key has unsupported encoding %r: %s",
+                        response.encoding,
+                        key,
+                    )
+                    unreadable.append(key)
+                    response = None
+
+                if response is None:
+                    log.debug("cache miss: %s", key)
+                    self._count("misses")
+                    self._memory.set(key, None)
+                elif expires_at is not None and response.created_at < expires_at:
+                    log.debug("cache key expired: %s", key)
+                    self._count("misses")
+                else:
+                    log.debug("cache hit (database): %s", key)
+                    self._count("database_hits")
+                    self._memory.set(key, response)
+                    found[key] = response
+
+            if unreadable:
+                self.discard_many(unreadable)
+
+        for key in found:
             self._add_bucket_key(key)
-            log.debug("cache hit: %s", key)
-            return response
+
+        with self._pending_lock:
+            self._accessed.update(found)
+            for key in keys:
+                self._lookups.setdefault(key, key in found)
+
+        return found
+
+    def lookups(self) -> tuple[int, int]:
+        """Returns the number of distinct keys that were found and not found
+        on their first lookup.
+
+        Unlike :py:attr:`stats`, keys that are looked up several times,
+        such as after being prefetched, are only counted once.
+
+        """
+        with self._pending_lock:
+            hits = sum(self._lookups.values())
+            return hits, len(self._lookups) - hits
+
+    def mark_validated(self, response: Response) -> None:
+        """Records that a cached response was confirmed to be up to date,
+        such as by a 304 Not Modified response.
+
+        If :py:meth:`deferred()` is active, the transaction is delayed
+        until it exits.
+
+        """
+        log.debug("marking cache key as validated: %s", response.key)
+
+        response.validated_at = datetime.datetime.now().astimezone()
+        self._memory.set(response.key, response)
+
+        with self._pending_lock:
+            if self._deferring > 0:
+                self._pending[response.key] = response
+                return
+
+        query = (
+            update(Response)
+            .where(Response.key == response.key)
+            .values(validated_at=response.validated_at)
+        )
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.execute(query)
 
     def set(
         self,
         key: str,
-        value: Any,
+        content: bytes,
         *,
         modified_at: datetime.datetime | None = None,
         etag: str | None = None,
     ) -> None:
-        """Sets a cached response for the given key."""
-        log.debug("setting cache key: %s", key)
+        """Sets a cached response for the given key.
+
+        :param content: The raw response body.
 
+        """
+        body, encoding = compress(content, self.encoding)
+        response = Response(
+            key=key,
+            body=body,
+            encoding=encoding,
+            modified_at=modified_at,
+            etag=etag,
+        )
+        self.set_many([response])
+
+    def set_many(self, responses: Iterable[Response]) -> None:
+        """Sets many cached responses in a single transaction.
+
+        Unlike :py:meth:`set()`, the body of each response is stored as-is.
+        The creation, validation, and access dates of each response
+        are set to the current time.
+        If :py:meth:`deferred()` is active, the transaction is delayed
+        until it exits.
+
+        """
+        now = datetime.datetime.now().astimezone()
+        responses = list(responses)
+        for response in responses:
+            log.debug("setting cache key: %s", response.key)
+            response.created_at = now
+            response.validated_at = now
+            response.accessed_at = now
+            response.size = len(response.body)
+            self._memory.set(response.key, response)
+            self._add_bucket_key(response.key)
+
+        with self._pending_lock:
+            if self._deferring > 0:
+                self._pending.update((r.key, r) for r in responses)
+                return
+
+        self._write(responses)
+
+    def summary(self) -> CacheSummary:
+        """Summarizes the responses stored in the database."""
+        query = select(
+            func.count(),
+            func.sum(Response.size),
+            func.min(Response.created_at),
+            func.max(Response.created_at),
+        )
+        expires_at = self._get_expiry_date()
         with self.sessionmaker.begin() as session:
-            response = Response(
-                created_at=datetime.datetime.now(),
-                etag=etag,
-                key=key,
-                modified_at=modified_at,
-                value=value,
-            )
-            session.merge(response)
+            entries, size, oldest, newest = session.execute(query).one()
+            expired = 0
+            if expires_at is not None:
+                expired = session.scalar(
+                    select(func.count()).where(Response.created_at < expires_at)
+                )
+
+        return CacheSummary(
+            entries=entries,
+            size=size or 0,
+            expired=expired or 0,
+            oldest=oldest,
+            newest=newest,
+        )
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + 1)
+
+    def _write(self, responses: list[Response]) -> None:
+        if not responses:
+            return
+
+        log.debug("writing %d cache key(s)", len(responses))
+        rows = [
+            {
+                "key": r.key,
+                "body": r.body,
+                "encoding": r.encoding,
+                "etag": r.etag,
+                "created_at": r.created_at,
+                "modified_at": r.modified_at,
+                "validated_at": r.validated_at,
+                "accessed_at": r.accessed_at,
+                "size": r.size,
+            }
+            for r in responses
+        ]
 
-        self._add_bucket_key(key)
+        query = insert(Response)
+        query = query.on_conflict_do_update(
+            index_elements=[Response.key],
+            set_={name: query.excluded[name] for name in rows[0] if name != "key"},
+        )
+        with self._write_lock, self.sessionmaker.begin() as session:
+            for batch in _batched(rows, MAX_BATCH_SIZE):
+                session.execute(query, batch)
 
     def _add_bucket_key(self, key: str) -> None:
         bucket = _bucket.get(None)
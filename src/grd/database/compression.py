@@ -0,0 +1,70 @@
+"""Compression of response bodies stored in the database.
+
+The zstd encoding requires the optional ``zstandard`` package,
+which can be installed with ``pip install github-release-downloader[zstd]``.
+When it is unavailable, zlib is used instead, and bodies that were
+stored with zstd by another installation cannot be read.
+
+"""
+import functools
+import importlib.util
+import zlib
+from typing import Literal
+
+Encoding = Literal["identity", "zlib", "zstd"]
+
+MIN_COMPRESS_SIZE = 256
+"""Bodies smaller than this number of bytes are stored uncompressed."""
+
+
+def compress(data: bytes, encoding: Encoding) -> tuple[bytes, Encoding]:
+    """Compresses data with the given encoding.
+
+    :returns:
+        The compressed data and the encoding that was actually used.
+        Small bodies are returned as-is with the "identity" encoding.
+
+    """
+    if encoding == "identity" or len(data) < MIN_COMPRESS_SIZE:
+        return data, "identity"
+    elif encoding == "zlib":
+        return zlib.compress(data), "zlib"
+    elif encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(data), "zstd"
+
+    raise ValueError(f"Unknown encoding: {encoding!r}")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Decompresses data that was compressed with the given encoding."""
+    if encoding == "identity":
+        return data
+    elif encoding == "zlib":
+        return zlib.decompress(data)
+    elif encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    raise ValueError(f"Unknown encoding: {encoding!r}")
+
+
+def get_default_encoding() -> Encoding:
+    """Returns the best encoding supported by the installed packages."""
+    if is_supported("zstd"):
+        return "zstd"
+    return "zlib"
+
+
+@functools.cache
+def is_supported(encoding: str) -> bool:
+    """Checks if data compressed with the given encoding can be decompressed
+    with the installed packages.
+    """
+    if encoding in ("identity", "zlib"):
+        return True
+    elif encoding == "zstd":
+        return importlib.util.find_spec("zstandard") is not None
+    return False
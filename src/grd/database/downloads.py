@@ -0,0 +1,50 @@
+import datetime
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import write_lock
+from .models import Download
+
+log = logging.getLogger(__name__)
+
+
+class DownloadTracker:
+    """Records the progress of downloads so they can be resumed
+    after being interrupted.
+
+    :param sessionmaker: The sessionmaker to use for storing downloads.
+
+    """
+
+    def __init__(self, sessionmaker: sessionmaker[Session]) -> None:
+        self.sessionmaker = sessionmaker
+        self._write_lock = write_lock
+
+    def discard(self, *paths: str) -> None:
+        """Discards the download progress for a set of paths."""
+        log.debug("discarding %d download(s)", len(paths))
+
+        query = delete(Download).where(Download.path.in_(paths))
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.execute(query)
+
+    def get(self, path: str) -> Download | None:
+        """Looks for the download progress of the given path."""
+        with self.sessionmaker.begin() as session:
+            session.expire_on_commit = False
+            return session.get(Download, path)
+
+    def save(self, download: Download) -> None:
+        """Saves the progress of a download."""
+        log.debug(
+            "saving download progress: %s (%d range(s))",
+            download.path,
+            len(download.ranges),
+        )
+
+        download.updated_at = datetime.datetime.now()
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.expire_on_commit = False
+            session.merge(download)
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import contextlib
 import logging
+import os
 import sqlite3
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterator
+from typing import TYPE_CHECKING, Iterator, Literal
 
 from sqlalchemy import create_engine as sa_create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker as sa_sessionmaker
 
-from . import engine_path
+from . import engine_path, writing
 from .models import Base
 
 if TYPE_CHECKING:
@@ -19,36 +23,178 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+SCHEMA_REVISION = "8e0a28dac903"
+"""The alembic revision of the latest migration.
+
+This must be updated whenever a migration is added. If it falls behind,
+alembic will be imported on every startup to check for migrations.
+
+"""
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """A set of pragmas applied to every SQLite connection.
+
+    Reference:
+        https://www.sqlite.org/pragma.html
+
+    """
+
+    journal_mode: Literal["delete", "truncate", "persist", "wal"] = "delete"
+    synchronous: Literal["off", "normal", "full", "extra"] = "full"
+    busy_timeout: int = 0
+    """The number of milliseconds to wait for other connections
+    to release their locks."""
+    mmap_size: int = 0
+    """The number of bytes of the database to memory-map."""
+    cache_size: int = -2000
+    """The page cache size in pages, or in KiB if negative."""
+    temp_store: Literal["default", "file", "memory"] = "default"
+
+
+PROFILES = {
+    "compatible": SQLiteProfile(),
+    "performance": SQLiteProfile(
+        journal_mode="wal",
+        synchronous="normal",
+        busy_timeout=10_000,
+        mmap_size=64 * 1024**2,
+        cache_size=-8000,
+        temp_store="memory",
+    ),
+}
+"""The available profiles, selectable with the ``GRD_SQLITE_PROFILE``
+environment variable.
+
+The "compatible" profile uses SQLite's default settings, which may be
+needed for databases stored on network filesystems that do not support
+write-ahead logging.
+
+"""
+
+DEFAULT_PROFILE = "performance"
+
+
+def get_profile() -> SQLiteProfile:
+    """Returns the profile selected by the ``GRD_SQLITE_PROFILE``
+    environment variable, or the default profile if unset.
+    """
+    name = os.environ.get("GRD_SQLITE_PROFILE", DEFAULT_PROFILE).lower()
+    profile = PROFILES.get(name)
+    if profile is None:
+        log.warning("unknown SQLite profile %r, using %r", name, DEFAULT_PROFILE)
+        profile = PROFILES[DEFAULT_PROFILE]
+    return profile
+
+
+def set_journal_mode(
+    conn: sqlite3.Connection | DBAPICursor,
+    profile: SQLiteProfile,
+) -> None:
+    """Applies the journal mode of a profile to a connection.
+
+    Unlike other pragmas, this requires reading the database,
+    so it must be done after an encrypted database is decrypted.
+
+    :raises sqlite3.DatabaseError: Database is encrypted or malformed.
+
+    """
+    conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+
+
+@dataclass
+class RoundTrips:
+    """Counts the round trips made to a database through an engine.
+
+    Statements executed directly on DBAPI connections, like the pragmas
+    applied to new connections, are not included.
+
+    """
+
+    connections: int = 0
+    transactions: int = 0
+    statements: int = 0
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def add(self, stat: str) -> None:
+        with self._lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def listen(self, engine: Engine) -> None:
+        """Starts counting the round trips made through the given engine."""
+        event.listen(engine, "connect", lambda *args: self.add("connections"))
+        event.listen(engine, "begin", lambda *args: self.add("transactions"))
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda *args: self.add("statements"),
+        )
+
 
 # Listeners to apply various improvements to sqlite3 connections
 # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#foreign-key-support
 # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#serializable-isolation-savepoints-transactional-ddl
-def _setup_sqlite_events(engine: Engine) -> None:
+def _setup_sqlite_events(engine: Engine, profile: SQLiteProfile) -> None:
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(conn: sqlite3.Connection, record):
         conn.isolation_level = None
         conn.execute("PRAGMA foreign_keys = on")
+        conn.execute(f"PRAGMA busy_timeout = {profile.busy_timeout:d}")
+        conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {profile.mmap_size:d}")
+        conn.execute(f"PRAGMA cache_size = {profile.cache_size:d}")
+        conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+
+        try:
+            set_journal_mode(conn, profile)
+        except sqlite3.DatabaseError:
+            log.debug("database is encrypted, deferring journal mode")
 
     @event.listens_for(engine, "begin")
     def do_begin(conn: Connection):
-        conn.exec_driver_sql("BEGIN")
+        # Writers take the lock upfront so that other processes wait on
+        # the busy timeout, rather than failing to upgrade their lock
+        if writing.get():
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
 
 
-def create_engine(*args, **kwargs) -> Engine:
+def create_engine(
+    *args,
+    profile: SQLiteProfile | None = None,
+    **kwargs,
+) -> Engine:
     """A wrapper over :py:func:`sqlalchemy.create_engine()` which handles
     extra configuration based on the dialect.
+
+    :param profile:
+        The pragmas to apply to SQLite connections.
+        If None, the "compatible" profile is used.
+
     """
     engine = sa_create_engine(*args, **kwargs)
     if engine.dialect.name == "sqlite":
-        _setup_sqlite_events(engine)
+        _setup_sqlite_events(engine, profile or PROFILES["compatible"])
     return engine
 
 
 class SQLiteEncryptionManager:
-    def __init__(self, engine: Engine, *, password: str | None = None):
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        password: str | None = None,
+        profile: SQLiteProfile | None = None,
+    ):
         assert engine.dialect.name == "sqlite"
         self.engine = engine
         self.password = password
+        self.profile = profile or PROFILES["compatible"]
+        self._password_version = 0
         self._setup_decrypt_hook()
 
     def decrypt_connection(self, conn: Connection, password: str) -> bool:
@@ -69,6 +215,8 @@ class SQLiteEncryptionManager:
         success = not self.is_encrypted(conn)
         if success:
             self.password = password
+            with self._raw_cursor(conn) as c:
+                set_journal_mode(c, self.profile)
         return success
 
     def change_password(self, conn: Connection, new_password: str) -> None:
@@ -88,16 +236,15 @@ class SQLiteEncryptionManager:
             )
 
         escaped_password = self._escape_string(new_password)
-        is_encrypting = escaped_password != ""
 
         with self._raw_cursor(conn) as c:
-            if is_encrypting:
-                # Encryption requires a rollback journal
-                c.execute("PRAGMA journal_mode = delete")
-
+            # Rekeying in either direction requires a rollback journal
+            c.execute("PRAGMA journal_mode = delete")
             c.execute(f"PRAGMA rekey = '{escaped_password}'")
+            set_journal_mode(c, self.profile)
 
         self.password = new_password
+        self._password_version += 1
 
     def is_encrypted(self, conn: Connection) -> bool:
         """Checks if the database is encrypted.
@@ -133,8 +280,14 @@ class SQLiteEncryptionManager:
         event.listen(self.engine, "engine_connect", self._decrypt_hook)
 
     def _decrypt_hook(self, conn: Connection) -> None:
-        if not self.is_encrypted(conn):
+        # Only check each DBAPI connection once instead of on every checkout,
+        # unless the password was changed since then
+        info = conn.connection.info
+        if info.get("checked_password") == self._password_version:
+            return
+        elif not self.is_encrypted(conn):
             # Nothing to do
+            info["checked_password"] = self._password_version
             return
         elif not self.supports_encryption(conn):
             # Can't decrypt database
@@ -142,8 +295,8 @@ class SQLiteEncryptionManager:
         elif self.password is None:
             # Missing password
             return
-        else:
-            self.decrypt_connection(conn, self.password)
+        elif self.decrypt_connection(conn, self.password):
+            info["checked_password"] = self._password_version
 
     def _check_same_engine(self, conn: Connection):
         if conn.engine is not self.engine:
@@ -171,10 +324,16 @@ class SQLiteEncryptionManager:
 
 
 class SQLiteEngineManager:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, *, profile: SQLiteProfile | None = None):
         self.path = path
-        self.engine = create_engine(f"sqlite+pysqlite:///{path}")
+        self.profile = profile or PROFILES["compatible"]
+        self.engine = create_engine(
+            f"sqlite+pysqlite:///{path}",
+            profile=self.profile,
+        )
         self.sessionmaker = sa_sessionmaker(self.engine)
+        self.round_trips = RoundTrips()
+        self.round_trips.listen(self.engine)
 
     def database_exists(self) -> bool:
         """Checks if the database exists on disk.
@@ -184,8 +343,28 @@ class SQLiteEngineManager:
         """
         return self.path.is_file()
 
+    def get_revision(self) -> str | None:
+        """Returns the alembic revision that the database was migrated to,
+        or None if it has not been stamped.
+        """
+        with self.engine.connect() as conn:
+            try:
+                query = "SELECT version_num FROM alembic_version"
+                return conn.exec_driver_sql(query).scalar()
+            except OperationalError:
+                return None
+
     def run_migrations(self) -> None:
-        """Setup the database by running any necessary migrations."""
+        """Setup the database by running any necessary migrations.
+
+        Alembic is only imported if the database does not exist or is not
+        at :py:data:`SCHEMA_REVISION`, keeping startup fast otherwise.
+
+        """
+        if self.database_exists() and self.get_revision() == SCHEMA_REVISION:
+            log.debug("database is up to date")
+            return
+
         from alembic import command
 
         config = self._get_alembic_config()
@@ -200,6 +379,14 @@ class SQLiteEngineManager:
             log.debug("running database migrations")
             command.upgrade(config, "head")
 
+        revision = self.get_revision()
+        if revision != SCHEMA_REVISION:
+            log.warning(
+                "database is at revision %s but SCHEMA_REVISION is %s",
+                revision,
+                SCHEMA_REVISION,
+            )
+
     @staticmethod
     def _get_alembic_config() -> Config:
         from alembic.config import Config
@@ -214,7 +401,10 @@ class SQLiteEngineManager:
         return cfg
 
 
-engine_manager = SQLiteEngineManager(engine_path)
-sqlite_encrypter = SQLiteEncryptionManager(engine_manager.engine)
+engine_manager = SQLiteEngineManager(engine_path, profile=get_profile())
+sqlite_encrypter = SQLiteEncryptionManager(
+    engine_manager.engine,
+    profile=engine_manager.profile,
+)
 engine = engine_manager.engine
 sessionmaker = engine_manager.sessionmaker
@@ -0,0 +1,195 @@
+"""An in-memory response cache for running without a database.
+
+Unlike :py:mod:`grd.database.cache`, this module does not import SQLAlchemy,
+keeping startup fast for one-shot commands.
+
+"""
+from __future__ import annotations
+
+import contextlib
+import datetime
+import enum
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Generator, Iterable
+
+log = logging.getLogger(__name__)
+
+
+class Freshness(enum.Enum):
+    """Describes whether a cached response can be used without
+    revalidating it with the server.
+    """
+
+    FRESH = "fresh"
+    """The response can be used without any network request."""
+    STALE = "stale"
+    """The response can be used, but should be revalidated afterwards."""
+    MUST_REVALIDATE = "must-revalidate"
+    """The response must be revalidated before it can be used."""
+
+
+def get_freshness(
+    validated_at: datetime.datetime,
+    max_age: datetime.timedelta | None,
+    stale_while_revalidate: datetime.timedelta | None,
+) -> Freshness:
+    """Determines the freshness of a response last validated at the given date."""
+    if max_age is None:
+        return Freshness.MUST_REVALIDATE
+
+    age = datetime.datetime.now().astimezone() - validated_at
+    if age < max_age:
+        return Freshness.FRESH
+    elif stale_while_revalidate is not None and age < max_age + stale_while_revalidate:
+        return Freshness.STALE
+    return Freshness.MUST_REVALIDATE
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now().astimezone()
+
+
+@dataclass(kw_only=True)
+class CachedResponse:
+    """A response stored by :py:class:`MemoryResponseCache`.
+
+    This has the same attributes used by clients as
+    :py:class:`~grd.database.models.Response`.
+
+    """
+
+    key: str
+    content: bytes
+    etag: str | None = None
+    modified_at: datetime.datetime | None = None
+    created_at: datetime.datetime = field(default_factory=_now)
+    validated_at: datetime.datetime | None = None
+
+
+class MemoryResponseCache:
+    """Caches responses in memory for the lifetime of the process.
+
+    This implements the methods of :py:class:`~grd.database.cache.ResponseCache`
+    used by clients and commands, but nothing is persisted and there is
+    no size limit, so it is only suited for short-lived processes.
+
+    :param max_age:
+        The amount of time after a response was last validated during
+        which it can be used without revalidating it. If None, responses
+        must always be revalidated.
+    :param stale_while_revalidate:
+        The amount of time after max-age during which a response can
+        still be used while it is revalidated afterwards.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        max_age: datetime.timedelta | None = None,
+        stale_while_revalidate: datetime.timedelta | None = None,
+    ) -> None:
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self._responses: dict[str, CachedResponse] = {}
+        self._lookups: dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def bucket(self) -> Generator[set[str], None, None]:
+        """Returns a context manager for compatibility with
+        :py:meth:`ResponseCache.bucket() <grd.database.cache.ResponseCache.bucket>`.
+
+        Since responses are not persisted, nothing is invalidated on errors.
+
+        """
+        yield set()
+
+    @contextlib.contextmanager
+    def deferred(self) -> Generator[None, None, None]:
+        """Returns a context manager for compatibility with
+        :py:meth:`ResponseCache.deferred() <grd.database.cache.ResponseCache.deferred>`.
+
+        Writes are never deferred since they are made in memory.
+
+        """
+        yield
+
+    def discard(self, *keys: str) -> None:
+        """Discards a set of keys from the cache."""
+        self.discard_many(keys)
+
+    def discard_many(self, keys: Iterable[str]) -> None:
+        """Discards many keys from the cache."""
+        with self._lock:
+            for key in keys:
+                self._responses.pop(key, None)
+
+    def flush(self) -> None:
+        """Does nothing, since there is no database to write to."""
+
+    def freshness(self, response: CachedResponse) -> Freshness:
+        """Determines if a response can be used without revalidating it."""
+        return get_freshness(
+            response.validated_at or response.created_at,
+            self.max_age,
+            self.stale_while_revalidate,
+        )
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Looks for a response in the cache."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CachedResponse]:
+        """Looks for many responses in the cache.
+
+        :returns: A dictionary of every key that was found in the cache.
+
+        """
+        found: dict[str, CachedResponse] = {}
+        with self._lock:
+            for key in keys:
+                response = self._responses.get(key)
+                if response is not None:
+                    found[key] = response
+                self._lookups.setdefault(key, response is not None)
+
+        log.debug("found %d key(s) in memory", len(found))
+        return found
+
+    def lookups(self) -> tuple[int, int]:
+        """Returns the number of distinct keys that were found and not found
+        on their first lookup.
+        """
+        with self._lock:
+            hits = sum(self._lookups.values())
+            return hits, len(self._lookups) - hits
+
+    def mark_validated(self, response: CachedResponse) -> None:
+        """Records that a cached response was confirmed to be up to date."""
+        response.validated_at = _now()
+
+    def set(
+        self,
+        key: str,
+        content: bytes,
+        *,
+        modified_at: datetime.datetime | None = None,
+        etag: str | None = None,
+    ) -> None:
+        """Sets a cached response for the given key.
+
+        :param content: The raw response body.
+
+        """
+        log.debug("setting cache key in memory: %s", key)
+        response = CachedResponse(
+            key=key,
+            content=content,
+            modified_at=modified_at,
+            etag=etag,
+        )
+        with self._lock:
+            self._responses[key] = response
@@ -1,4 +1,5 @@
 import datetime
+import json
 from typing import Any
 
 from sqlalchemy import DateTime, JSON, TypeDecorator
@@ -46,22 +47,121 @@ Base.metadata.naming_convention = {
 
 
 class Response(Base, kw_only=True):
-    """Stores a key-value mapping of cached responses."""
+    """Stores a key-value mapping of cached responses.
+
+    The raw response body is stored, optionally compressed according to
+    :py:attr:`encoding`. It is only decompressed and decoded when
+    :py:attr:`content` or :py:meth:`json()` is accessed.
+
+    """
 
     __tablename__ = "response_cache"
 
     created_at: Mapped[datetime.datetime] = mapped_column(
         TZDateTime,
         default=datetime.datetime.now,
+        index=True,
     )
     modified_at: Mapped[datetime.datetime | None] = mapped_column(
         TZDateTime,
         default=None,
     )
+    validated_at: Mapped[datetime.datetime | None] = mapped_column(
+        TZDateTime,
+        default=None,
+    )
+    accessed_at: Mapped[datetime.datetime] = mapped_column(
+        TZDateTime,
+        default=datetime.datetime.now,
+        index=True,
+    )
     key: Mapped[str] = mapped_column(primary_key=True)
-    value: Mapped[Any] = mapped_column(JSON)
+    body: Mapped[bytes]
+    size: Mapped[int] = mapped_column(default=0)
+    encoding: Mapped[str] = mapped_column(default="identity")
     etag: Mapped[str | None] = mapped_column(default=None)
 
+    @property
+    def content(self) -> bytes:
+        """The decompressed response body."""
+        from .compression import decompress
+
+        return decompress(self.body, self.encoding)
+
+    def json(self) -> Any:
+        """Decodes the response body as JSON."""
+        return json.loads(self.content)
+
+
+class Download(Base, kw_only=True):
+    """Stores the progress of an asset being downloaded to a file.
+
+    Once the download completes, the row is kept with :py:attr:`completed_at`
+    set so that the file can later be updated only if the asset changed.
+
+    """
+
+    __tablename__ = "download"
+
+    path: Mapped[str] = mapped_column(primary_key=True)
+    asset_id: Mapped[int]
+    size: Mapped[int]
+    etag: Mapped[str | None] = mapped_column(default=None)
+    ranges: Mapped[list[list[int]]] = mapped_column(JSON, default_factory=list)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        TZDateTime,
+        default_factory=datetime.datetime.now,
+    )
+    asset_updated_at: Mapped[datetime.datetime | None] = mapped_column(
+        TZDateTime,
+        default=None,
+    )
+    completed_at: Mapped[datetime.datetime | None] = mapped_column(
+        TZDateTime,
+        default=None,
+    )
+
+
+class StoredAsset(Base, kw_only=True):
+    """Stores the location of an asset kept in the local asset store."""
+
+    __tablename__ = "asset_store"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    asset_id: Mapped[int]
+    digest: Mapped[str | None] = mapped_column(default=None)
+    filename: Mapped[str]
+    size: Mapped[int]
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        TZDateTime,
+        default_factory=datetime.datetime.now,
+    )
+    accessed_at: Mapped[datetime.datetime] = mapped_column(
+        TZDateTime,
+        default_factory=datetime.datetime.now,
+    )
+
+
+class RateLimit(Base, kw_only=True):
+    """Stores the latest rate limit reported by GitHub for a token.
+
+    Tokens are identified by a hash rather than stored again, and
+    anonymous requests share the key ``"anonymous"``.
+
+    """
+
+    __tablename__ = "rate_limit"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    resource: Mapped[str] = mapped_column(primary_key=True)
+    limit: Mapped[int]
+    remaining: Mapped[int]
+    reset_at: Mapped[datetime.datetime] = mapped_column(TZDateTime)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        TZDateTime,
+        default_factory=datetime.datetime.now,
+    )
+
 
 class User(Base, kw_only=True):
     """Stores various user settings."""
@@ -73,6 +173,17 @@ class User(Base, kw_only=True):
     github_token: Mapped[str | None] = mapped_column(default=None)
 
     cache_expiry: Mapped[datetime.timedelta | None] = mapped_column(default=None)
+    cache_max_age: Mapped[datetime.timedelta | None] = mapped_column(default=None)
+    cache_stale_while_revalidate: Mapped[datetime.timedelta | None] = mapped_column(
+        default=None
+    )
+    cache_max_size: Mapped[int | None] = mapped_column(default=None)
+    cache_max_entries: Mapped[int | None] = mapped_column(default=None)
+    cache_hits: Mapped[int] = mapped_column(default=0)
+    cache_misses: Mapped[int] = mapped_column(default=0)
+
+    asset_store_enabled: Mapped[bool] = mapped_column(default=False)
+    asset_store_max_size: Mapped[int | None] = mapped_column(default=None)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import logging
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import write_lock
+from .models import RateLimit
+
+log = logging.getLogger(__name__)
+
+
+class RateLimitStore:
+    """Shares the rate limits reported by GitHub between processes.
+
+    :param sessionmaker: The sessionmaker to use for storing rate limits.
+
+    """
+
+    def __init__(self, sessionmaker: sessionmaker[Session]) -> None:
+        self.sessionmaker = sessionmaker
+        self._write_lock = write_lock
+
+    def get(self, key: str) -> list[RateLimit]:
+        """Returns the rate limit of every resource recorded for a key."""
+        query = select(RateLimit).where(RateLimit.key == key)
+        with self.sessionmaker.begin() as session:
+            session.expire_on_commit = False
+            return list(session.scalars(query))
+
+    def save(self, rate_limits: list[RateLimit]) -> None:
+        """Saves the given rate limits.
+
+        Since responses from concurrent processes can be recorded out of
+        order, a rate limit in the same window as the one already stored
+        only replaces its remaining requests if it is lower.
+
+        """
+        if not rate_limits:
+            return
+
+        log.debug("saving %d rate limit(s)", len(rate_limits))
+        rows = [
+            {
+                "key": r.key,
+                "resource": r.resource,
+                "limit": r.limit,
+                "remaining": r.remaining,
+                "reset_at": r.reset_at,
+                "updated_at": r.updated_at,
+            }
+            for r in rate_limits
+        ]
+
+        query = insert(RateLimit)
+        excluded = query.excluded
+        newer = excluded.reset_at > RateLimit.reset_at
+        query = query.on_conflict_do_update(
+            index_elements=[RateLimit.key, RateLimit.resource],
+            set_={
+                "limit": excluded.limit,
+                "remaining": case(
+                    (newer, excluded.remaining),
+                    else_=func.min(RateLimit.remaining, excluded.remaining),
+                ),
+                "reset_at": func.max(RateLimit.reset_at, excluded.reset_at),
+                "updated_at": excluded.updated_at,
+            },
+        )
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.execute(query, rows)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import datetime
+import errno
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import write_lock
+from .models import StoredAsset
+
+if TYPE_CHECKING:
+    from ..client.models import ReleaseAsset
+
+LinkMode = Literal["auto", "reflink", "hardlink", "copy"]
+
+log = logging.getLogger(__name__)
+
+
+class AssetStore:
+    """Manages a local store of downloaded assets.
+
+    Assets are identified by their digest when available, otherwise by
+    their ID and last update time. Stored assets can be materialized into
+    other locations without any network traffic by reflinking,
+    hardlinking, or copying them.
+
+    Assets are always added to the store by reflinking or copying them,
+    and are made read-only, so that changes to the downloaded file cannot
+    corrupt the stored copy. Hardlinks are only made when materializing
+    with the "hardlink" link mode, in which case the destination is
+    read-only as well.
+
+    :param sessionmaker: The sessionmaker to use for tracking stored assets.
+    :param directory: The directory to keep stored assets in.
+    :param max_size:
+        The maximum number of bytes the store can hold before the least
+        recently used assets are evicted. If None, the store is unbounded.
+    :param link_mode:
+        How assets should be materialized. "auto" attempts a reflink,
+        then falls back to copying.
+
+    """
+
+    def __init__(
+        self,
+        sessionmaker: sessionmaker[Session],
+        directory: Path,
+        *,
+        max_size: int | None = None,
+        link_mode: LinkMode = "auto",
+    ) -> None:
+        self.sessionmaker = sessionmaker
+        self.directory = directory
+        self.max_size = max_size
+        self.link_mode: LinkMode = link_mode
+        self._write_lock = write_lock
+
+    def add(self, asset: ReleaseAsset, source: Path) -> None:
+        """Adds a downloaded asset to the store.
+
+        If the asset cannot be identified, this does nothing.
+
+        """
+        key = get_store_key(asset)
+        if key is None:
+            return
+
+        log.debug("storing asset: %s", key)
+
+        filename = key.replace(":", "-")
+        dest = self.directory / filename
+        temp = dest.with_name(f"{filename}.{os.getpid()}.tmp")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _unlink(temp)
+        # Never hardlink the source, or editing it would corrupt the store
+        link_file(source, temp, "copy" if self.link_mode == "copy" else "auto")
+        temp.chmod(0o444)
+        temp.replace(dest)
+
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.merge(
+                StoredAsset(
+                    key=key,
+                    asset_id=asset.id,
+                    digest=asset.digest,
+                    filename=filename,
+                    size=dest.stat().st_size,
+                )
+            )
+
+        self.evict()
+
+    def clear(self) -> None:
+        """Removes every asset from the store."""
+        log.debug("clearing asset store")
+
+        with self._write_lock, self.sessionmaker.begin() as session:
+            session.execute(delete(StoredAsset))
+            shutil.rmtree(self.directory, onerror=_remove_read_only)
+
+    def evict(self, max_size: int | None = None) -> None:
+        """Evicts the least recently used assets until the store is
+        within the given size.
+
+        :param max_size:
+            The maximum size of the store.
+            If None, :py:attr:`max_size` is used.
+
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_size is None:
+            return
+
+        with self._write_lock, self.sessionmaker.begin() as session:
+            total = session.scalar(select(func.sum(StoredAsset.size))) or 0
+            if total <= max_size:
+                return
+
+            query = select(StoredAsset).order_by(StoredAsset.accessed_at)
+            for stored in session.scalars(query):
+                if total <= max_size:
+                    break
+
+                log.debug("evicting stored asset: %s", stored.key)
+                _unlink(self.directory / stored.filename)
+                session.delete(stored)
+                total -= stored.size
+
+    def materialize(self, asset: ReleaseAsset, dest: Path) -> bool:
+        """Materializes a stored asset at the given destination.
+
+        :returns: True if the asset was found in the store, False otherwise.
+
+        """
+        key = get_store_key(asset)
+        if key is None:
+            return False
+
+        with self._write_lock, self.sessionmaker.begin() as session:
+            stored = session.get(StoredAsset, key)
+            if stored is None:
+                log.debug("asset not in store: %s", key)
+                return False
+
+            source = self.directory / stored.filename
+            if not source.is_file() or source.stat().st_size != stored.size:
+                log.debug("stored asset is missing or corrupted: %s", key)
+                _unlink(source)
+                session.delete(stored)
+                return False
+
+            stored.accessed_at = datetime.datetime.now()
+
+        log.debug("materializing stored asset: %s", key)
+        link_file(source, dest, self.link_mode)
+        return True
+
+    def size(self) -> tuple[int, int]:
+        """Returns the number of stored assets and their total size in bytes."""
+        query = select(func.count(), func.sum(StoredAsset.size))
+        with self.sessionmaker.begin() as session:
+            count, total = session.execute(query).one()
+        return count, total or 0
+
+
+def get_store_key(asset: ReleaseAsset) -> str | None:
+    """Returns the key identifying an asset's contents in the store,
+    or None if the asset cannot be reliably identified.
+    """
+    if asset.digest is not None:
+        return asset.digest
+    elif asset.updated_at is not None:
+        return f"asset:{asset.id}:{int(asset.updated_at.timestamp())}"
+    return None
+
+
+def link_file(source: Path, dest: Path, mode: LinkMode) -> None:
+    """Creates dest as a reflink, hardlink, or copy of source.
+
+    The "auto" mode attempts a reflink and falls back to copying.
+    Hardlinks are only made when explicitly requested, since
+    the destination then shares its contents with the source.
+
+    :raises FileExistsError: The destination already exists.
+
+    """
+    if dest.exists():
+        raise FileExistsError(f"{dest} already exists")
+
+    if mode in ("auto", "reflink"):
+        try:
+            return _reflink(source, dest)
+        except OSError as e:
+            dest.unlink(missing_ok=True)
+            if mode == "reflink":
+                raise
+            log.debug("could not reflink %s: %s", source, e)
+
+    if mode == "hardlink":
+        return os.link(source, dest)
+
+    shutil.copyfile(source, dest)
+
+
+def _remove_read_only(func, path, exc_info) -> None:
+    # Read-only files cannot be removed on Windows, so make them writable first
+    try:
+        os.chmod(path, 0o644)
+        func(path)
+    except OSError:
+        pass
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except PermissionError:
+        path.chmod(0o644)
+        path.unlink(missing_ok=True)
+
+
+def _reflink(source: Path, dest: Path) -> None:
+    if sys.platform != "linux":
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux")
+
+    import fcntl
+
+    FICLONE = 0x40049409
+    with open(source, "rb") as src, open(dest, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
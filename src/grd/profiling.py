@@ -0,0 +1,114 @@
+"""Measures the time spent in each phase of a command.
+
+Profiling is disabled until :py:meth:`Profiler.enable()` is called,
+after which :py:meth:`Profiler.phase()` records the duration of each
+block it wraps. This module must not import any third-party packages
+since it is imported before the rest of the program.
+
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Generator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+STARTED_AT = time.perf_counter()
+"""The time at which this module was first imported."""
+
+
+@dataclass
+class PhaseTiming:
+    """The total duration and number of times a phase was entered."""
+
+    seconds: float = 0.0
+    count: int = 0
+
+
+class Profiler:
+    """Accumulates the duration of named phases.
+
+    Phases can be entered concurrently from multiple threads, in which case
+    their durations are summed and may add up to more than the elapsed time.
+
+    :param started_at:
+        The :py:func:`time.perf_counter()` value at which the program
+        started, used to measure the time spent importing modules.
+
+    """
+
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.enabled = False
+        self.phases: dict[str, PhaseTiming] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Starts recording phases.
+
+        The time since the program started is recorded as the "imports" phase.
+
+        """
+        if self.enabled:
+            return
+
+        self.enabled = True
+        self.add("imports", time.perf_counter() - self.started_at)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds a duration to the given phase."""
+        with self._lock:
+            timing = self.phases.setdefault(name, PhaseTiming())
+            timing.seconds += seconds
+            timing.count += 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        """Records the duration of the block as part of the given phase."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def iterate(self, name: str, it: Iterable[T]) -> Generator[T, None, None]:
+        """Records the time spent waiting for each item of an iterable
+        as part of the given phase.
+        """
+        if not self.enabled:
+            yield from it
+            return
+
+        iterator = iter(it)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(name, time.perf_counter() - start)
+            yield item
+
+    def report(self) -> str:
+        """Returns a table of every phase recorded so far."""
+        elapsed = time.perf_counter() - self.started_at
+        lines = [f"{'phase':<12} {'time':>11} {'count':>7}"]
+        with self._lock:
+            for name, timing in self.phases.items():
+                lines.append(
+                    f"{name:<12} {timing.seconds * 1000:>8.1f} ms {timing.count:>7}"
+                )
+        lines.append(f"{'total':<12} {elapsed * 1000:>8.1f} ms")
+        return "\n".join(lines)
+
+
+profiler = Profiler(STARTED_AT)
+"""The profiler used by the command-line interface."""